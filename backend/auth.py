@@ -1,7 +1,17 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 import jwt
 from passlib.context import CryptContext
+from backend import metrics
+from backend.user_store import UserExistsError, create_user_store
 
 # Secret key for JWT (in production, use environment variable)
 SECRET_KEY = "your-secret-key-change-in-production"
@@ -9,10 +19,40 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
-# In-memory user storage
-users_db = {}
+# Password hashing pool ("thread" or "process"); bcrypt never runs on the event loop
+HASHING_POOL_KIND = os.getenv("HASHING_POOL_KIND", "thread")
+HASHING_POOL_WORKERS = int(os.getenv("HASHING_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Maximum number of hash/verify calls allowed to wait for a free worker
+HASHING_QUEUE_SIZE = int(os.getenv("HASHING_QUEUE_SIZE", "32"))
+
+# Verified-token cache
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+# How often each worker drops cached tokens revoked by other workers
+REVOCATION_POLL_SECONDS = 1
+
+PASSWORD_HASH_SECONDS = metrics.histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time inside a pool worker", ("operation",)
+)
+PASSWORD_HASH_QUEUE_SECONDS = metrics.histogram(
+    "password_hash_queue_seconds", "Time bcrypt calls spend queued for and handed to a pool worker", ("operation",)
+)
+JWT_DECODE_SECONDS = metrics.histogram(
+    "jwt_decode_duration_seconds", "JWT decode and verification time on token cache misses",
+    buckets=metrics.FAST_BUCKETS
+)
+
+# User storage (SQLite when USER_DB_PATH is set, otherwise in-memory)
+USER_DB_PATH = os.getenv("USER_DB_PATH")
+user_store = create_user_store(USER_DB_PATH)
+
+
+def token_digest(token: str) -> bytes:
+    """Digest identifying a token in the cache and in stored revocations."""
+    return hashlib.sha256(token.encode()).digest()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -25,6 +65,188 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _timed(func, *args) -> tuple:
+    """Run func in a pool worker and return (result, seconds it took there)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+class PasswordHasher:
+    """Run bcrypt hash/verify on a bounded worker pool."""
+
+    def __init__(
+        self,
+        kind: str = HASHING_POOL_KIND,
+        max_workers: int = HASHING_POOL_WORKERS,
+        queue_size: int = HASHING_QUEUE_SIZE
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing pool kind: {kind!r}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_pending = self.max_workers + max(0, queue_size)
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of hash/verify calls running or waiting for a worker."""
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    # Spawn rather than fork: the pool starts lazily, after the server's threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="bcrypt"
+                    )
+            return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingPoolSaturated("Password hashing queue is full")
+            self._pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, elapsed = await loop.run_in_executor(self._get_executor(), _timed, func, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+        PASSWORD_HASH_SECONDS.observe(elapsed, operation)
+        PASSWORD_HASH_QUEUE_SECONDS.observe(max(0.0, time.perf_counter() - start - elapsed), operation)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a password on the worker pool."""
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash on the worker pool."""
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        """Shut down the worker pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher()
+
+
+class TokenCache:
+    """Bounded LRU/TTL cache of verified JWT payloads keyed by token digest.
+
+    Revocations are kept in the user store. Each worker drops cached tokens
+    that any worker revoked via apply_revocations, which tracks the id of the
+    last revocation seen.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL_SECONDS):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.revocation_id = 0
+        # digest -> (expires_at, payload)
+        self._entries = OrderedDict()
+        # username -> set of digests, for invalidating every token of a user
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[dict]:
+        """Return the cached payload for a token, or None on a miss."""
+        key = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, token: str, payload: dict, revocation_id: int) -> None:
+        """Cache a verified payload until its exp claim or the TTL, whichever is sooner.
+
+        revocation_id is the cache's revocation_id from before the payload was
+        checked against the store; if revocations were applied since, the
+        payload may be stale and is not cached.
+        """
+        expires_at = min(payload.get("exp", 0), time.time() + self.ttl)
+        key = token_digest(token)
+        with self._lock:
+            if revocation_id != self.revocation_id:
+                return
+            self._remove(key)
+            self._entries[key] = (expires_at, payload)
+            self._by_user.setdefault(payload.get("sub"), set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: bytes) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        sub = entry[1].get("sub")
+        keys = self._by_user.get(sub)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[sub]
+
+    def invalidate(self, token: str) -> None:
+        """Drop a single token from the cache."""
+        with self._lock:
+            self._remove(token_digest(token))
+
+    def invalidate_user(self, username: str) -> None:
+        """Drop every cached token belonging to a user."""
+        with self._lock:
+            for key in list(self._by_user.get(username, ())):
+                self._remove(key)
+
+    def apply_revocations(self, last_id: int, revocations: list) -> None:
+        """Drop cached tokens named by (username, token digest or None) revocations."""
+        with self._lock:
+            for username, digest in revocations:
+                if digest is not None:
+                    self._remove(digest)
+                else:
+                    for key in list(self._by_user.get(username, ())):
+                        self._remove(key)
+            self.revocation_id = max(self.revocation_id, last_id)
+
+    def clear(self) -> None:
+        """Drop every cached token."""
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        """Return cache size and hit/miss counters."""
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -32,44 +254,85 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # Sub-second iat, so a token issued just after a user revocation is not caught by it
+    to_encode.update({"exp": expire, "iat": time.time()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[dict]:
-    """Verify and decode a JWT token."""
+async def verify_token(token: str) -> Optional[dict]:
+    """Verify and decode a JWT token, serving repeat tokens from the cache."""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    start = time.perf_counter()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
+        return None
+    finally:
+        JWT_DECODE_SECONDS.observe(time.perf_counter() - start)
+    revocation_id = token_cache.revocation_id
+    if await user_store.ais_token_revoked(payload.get("sub"), token_digest(token), payload.get("iat", 0)):
         return None
+    token_cache.put(token, payload, revocation_id)
+    return payload
+
+
+async def revoke_token(token: str) -> None:
+    """Revoke a token so that it is rejected immediately by every worker."""
+    payload = await verify_token(token)
+    if payload is not None:
+        await user_store.arevoke_token(payload.get("sub"), token_digest(token), payload.get("exp", 0))
+        token_cache.invalidate(token)
+
+
+async def sync_revocations() -> None:
+    """Drop cached tokens revoked through the user store since the last sync."""
+    last_id, revocations = await user_store.arevocations_since(token_cache.revocation_id)
+    token_cache.apply_revocations(last_id, revocations)
 
 
-def register_user(username: str, email: str, password: str) -> dict:
+async def register_user(username: str, email: str, password: str) -> dict:
     """Register a new user."""
-    if username in users_db:
+    if await user_store.aget(username) is not None:
         return {"error": "Username already exists"}
-    if any(user["email"] == email for user in users_db.values()):
+    if await user_store.aemail_exists(email):
         return {"error": "Email already exists"}
     
-    hashed_password = get_password_hash(password)
-    users_db[username] = {
-        "username": username,
-        "email": email,
-        "hashed_password": hashed_password
-    }
+    hashed_password = await password_hasher.hash(password)
+    try:
+        # Another signup may have claimed the name or email while we were hashing
+        await user_store.aadd(username, email, hashed_password)
+    except UserExistsError as exc:
+        return {"error": str(exc)}
     return {"message": "User registered successfully"}
 
 
-def authenticate_user(username: str, password: str) -> Optional[dict]:
+async def get_user(username: str) -> Optional[dict]:
+    """Look up a user by username."""
+    return await user_store.aget(username)
+
+
+async def delete_user(username: str) -> bool:
+    """Delete a user and revoke every token issued to them.
+
+    Not exposed over HTTP; meant for admin tooling.
+    """
+    now = time.time()
+    await user_store.arevoke_user_tokens(username, now, now + ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    token_cache.invalidate_user(username)
+    return await user_store.adelete(username)
+
+
+async def authenticate_user(username: str, password: str) -> Optional[dict]:
     """Authenticate a user and return user info if successful."""
-    user = users_db.get(username)
+    user = await user_store.aget(username)
     if not user:
         return None
-    if not verify_password(password, user["hashed_password"]):
+    if not await password_hasher.verify(password, user["hashed_password"]):
         return None
     return {"username": user["username"], "email": user["email"]}
 
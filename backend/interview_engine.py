@@ -1,20 +1,44 @@
 """
 Interview engine for generating questions based on topics.
+
+Questions live in a QuestionBank, built from the templates below by default
+or streamed from JSON Lines files pointed to by QUESTION_BANK_PATH. Each line
+is an object with "topic", "question" and optional "difficulty" (one of
+DIFFICULTIES), "tags" and "rubric" (a list of concepts, each a keyword or a
+list of alternatives). The server reloads the bank in the background when the
+files change; replace them atomically (write, then rename) to avoid loading a
+half-written file.
 """
 
-# Available interview topics
-TOPICS = [
-    "Python",
-    "JavaScript",
-    "Data Structures",
-    "Algorithms",
-    "System Design",
-    "Database",
-    "Web Development",
-    "Machine Learning",
-    "DevOps",
-    "Security"
-]
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from array import array
+from typing import Iterable, Iterator, Optional
+from backend import metrics
+from backend.scoring import derive_rubric, normalize_rubric
+from backend.similarity import SimilarityIndex
+
+logger = logging.getLogger(__name__)
+
+# JSON Lines file, or directory of *.jsonl files, to load the question bank from
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH")
+
+# How often QUESTION_BANK_PATH is checked for changes; 0 disables reloading
+QUESTION_BANK_POLL_SECONDS = int(os.getenv("QUESTION_BANK_POLL_SECONDS", "30"))
+
+# Accepted difficulties, and the one assigned to questions that do not specify one
+DIFFICULTIES = ("easy", "medium", "hard")
+DEFAULT_DIFFICULTY = "medium"
+
+QUESTION_SELECT_SECONDS = metrics.histogram(
+    "question_select_duration_seconds", "Time to pick question ids from the bank",
+    buckets=metrics.FAST_BUCKETS
+)
 
 # Question templates for each topic
 QUESTION_TEMPLATES = {
@@ -91,17 +115,281 @@ QUESTION_TEMPLATES = {
 }
 
 
-def get_topics() -> list:
-    """Get list of available interview topics."""
-    return TOPICS
+class QuestionBank:
+    """Compact, indexed store of interview questions.
+
+    Question ids are positions in the bank. Topics, difficulties and tags are
+    stored once and referenced by small integer codes, and every index is an
+    array of question ids.
+    """
+
+    # Index key component meaning "any difficulty" / "any tag"
+    ANY = -1
+
+    def __init__(self):
+        self.topics = []
+        self.difficulties = []
+        self.tags = []
+        self._topic_codes = {}
+        self._difficulty_codes = {}
+        self._tag_codes = {}
+        self._texts = []
+        self._topic_of = array("H")
+        self._difficulty_of = array("B")
+        # (topic code, difficulty code or ANY, tag code or ANY) -> array of ids
+        self._index = {}
+        # Question id -> rubric, for questions that define one
+        self._rubrics = {}
+        # Built after loading; None until the first build finishes
+        self.similarity: Optional[SimilarityIndex] = None
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    @staticmethod
+    def _code(name: str, names: list, codes: dict) -> int:
+        code = codes.get(name)
+        if code is None:
+            name = sys.intern(name)
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+
+    def _add_to_index(self, key: tuple, question_id: int) -> None:
+        ids = self._index.get(key)
+        if ids is None:
+            ids = self._index[key] = array("I")
+        ids.append(question_id)
+
+    def add(
+        self,
+        topic: str,
+        question: str,
+        difficulty: str = DEFAULT_DIFFICULTY,
+        tags: Iterable[str] = (),
+        rubric: Optional[Iterable] = None
+    ) -> int:
+        """Add a question and return its id."""
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"Difficulty must be one of {', '.join(DIFFICULTIES)}, got {difficulty!r}")
+        if isinstance(tags, str):
+            # A bare string is one tag, not a sequence of one-character tags
+            tags = (tags,)
+        elif not isinstance(tags, (list, tuple, set, frozenset)) or not all(isinstance(t, str) for t in tags):
+            raise ValueError(f"Tags must be a string or a list of strings, got {tags!r}")
+        question_id = len(self._texts)
+        topic_code = self._code(topic, self.topics, self._topic_codes)
+        difficulty_code = self._code(difficulty, self.difficulties, self._difficulty_codes)
+        self._texts.append(sys.intern(question))
+        self._topic_of.append(topic_code)
+        self._difficulty_of.append(difficulty_code)
+
+        any_ = self.ANY
+        self._add_to_index((topic_code, any_, any_), question_id)
+        self._add_to_index((topic_code, difficulty_code, any_), question_id)
+        for tag in set(tags):
+            tag_code = self._code(tag, self.tags, self._tag_codes)
+            self._add_to_index((topic_code, any_, tag_code), question_id)
+            self._add_to_index((topic_code, difficulty_code, tag_code), question_id)
+        if rubric:
+            self._rubrics[question_id] = normalize_rubric(rubric)
+        return question_id
+
+    @classmethod
+    def from_templates(cls, templates: dict) -> "QuestionBank":
+        """Build a bank from a {topic: [question, ...]} mapping."""
+        bank = cls()
+        for topic, questions in templates.items():
+            for question in questions:
+                bank.add(topic, question)
+        return bank
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "QuestionBank":
+        """Build a bank by streaming a JSON Lines file or a directory of them."""
+        bank = cls()
+        for record in iter_question_records(path):
+            bank.add(
+                record["topic"],
+                record["question"],
+                record.get("difficulty") or DEFAULT_DIFFICULTY,
+                record.get("tags") or (),
+                record.get("rubric")
+            )
+        return bank
+
+    def _ids(self, topic: str, difficulty: Optional[str], tag: Optional[str]):
+        topic_code = self._topic_codes.get(topic)
+        difficulty_code = self._difficulty_codes.get(difficulty) if difficulty else self.ANY
+        tag_code = self._tag_codes.get(tag) if tag else self.ANY
+        if topic_code is None or difficulty_code is None or tag_code is None:
+            return ()
+        return self._index.get((topic_code, difficulty_code, tag_code), ())
+
+    def has_topic(self, topic: str) -> bool:
+        """Check whether a topic exists in the bank."""
+        return topic in self._topic_codes
+
+    def count(self, topic: str, difficulty: Optional[str] = None, tag: Optional[str] = None) -> int:
+        """Count the questions matching a topic and optional filters."""
+        return len(self._ids(topic, difficulty, tag))
+
+    def select(
+        self,
+        topic: str,
+        count: int,
+        difficulty: Optional[str] = None,
+        tag: Optional[str] = None,
+        seed: Optional[int] = None
+    ) -> list:
+        """Pick question ids for a topic and optional filters.
+
+        Without a seed the first `count` matches are returned in bank order.
+        With a seed, `count` matches are sampled without replacement in
+        O(count), and the same seed always yields the same questions.
+        """
+        start = time.perf_counter()
+        ids = self._ids(topic, difficulty, tag)
+        if seed is None:
+            selected = ids[:count].tolist() if ids else []
+        else:
+            positions = random.Random(seed).sample(range(len(ids)), max(0, min(count, len(ids))))
+            selected = [ids[position] for position in positions]
+        QUESTION_SELECT_SECONDS.observe(time.perf_counter() - start)
+        return selected
+
+    def text(self, question_id: int) -> str:
+        """Get the text of a question."""
+        return self._texts[question_id]
+
+    def rubric(self, question_id: int) -> tuple:
+        """Get a question's rubric, derived from its text if it has none."""
+        rubric = self._rubrics.get(question_id)
+        if rubric is None:
+            rubric = derive_rubric(self._texts[question_id])
+        return rubric
+
+    def get(self, question_id: int) -> Optional[dict]:
+        """Get a question record by id, or None if it does not exist."""
+        if not 0 <= question_id < len(self._texts):
+            return None
+        return {
+            "id": question_id,
+            "topic": self.topics[self._topic_of[question_id]],
+            "difficulty": self.difficulties[self._difficulty_of[question_id]],
+            "question": self._texts[question_id]
+        }
+
+    def build_similarity_index(self) -> SimilarityIndex:
+        """Add every question not yet indexed to the similarity index."""
+        index = self.similarity or SimilarityIndex()
+        index.add(self._texts[i] for i in range(len(index), len(self._texts)))
+        self.similarity = index
+        return index
+
+    def related(self, question_id: int, k: int = 5) -> Optional[list]:
+        """Return up to k (question id, score) pairs, or None while the index is building."""
+        index = self.similarity
+        if index is None or question_id >= len(index):
+            return None
+        return index.related(question_id, k)
+
+
+def iter_question_records(path: str) -> Iterator[dict]:
+    """Stream question records from a JSON Lines file or a directory of them."""
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(path, name) for name in os.listdir(path) if name.endswith(".jsonl")
+        )
+    else:
+        files = [path]
+    for file_path in files:
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+# The active question bank; replaced wholesale on reload
+_bank = QuestionBank.from_templates(QUESTION_TEMPLATES)
+_bank.build_similarity_index()
+
+# Callbacks run whenever the question bank changes
+_bank_listeners = []
+
+_reload_lock = threading.Lock()
+
+
+def add_bank_listener(callback) -> None:
+    """Register a callback to run after the question bank changes."""
+    _bank_listeners.append(callback)
+
+
+def get_bank() -> QuestionBank:
+    """Get the active question bank."""
+    return _bank
+
+
+def set_bank(bank: QuestionBank) -> None:
+    """Replace the active question bank and notify listeners.
+
+    Sessions started on the old bank keep it alive for its questions and
+    rubrics, so its similarity index, only needed by the active bank, is dropped.
+    """
+    global _bank
+    previous, _bank = _bank, bank
+    if previous is not bank:
+        previous.similarity = None
+    for callback in list(_bank_listeners):
+        callback()
+
+
+def question_bank_mtime(path: str) -> float:
+    """Latest modification time of a bank file, or of a bank directory and its *.jsonl files."""
+    if not os.path.isdir(path):
+        return os.stat(path).st_mtime
+    times = [os.stat(path).st_mtime]
+    times.extend(
+        os.stat(os.path.join(path, name)).st_mtime for name in os.listdir(path) if name.endswith(".jsonl")
+    )
+    return max(times)
+
+
+def reload_question_bank(path: str) -> QuestionBank:
+    """Load a question bank from disk and make it active."""
+    with _reload_lock:
+        bank = QuestionBank.from_jsonl(path)
+        set_bank(bank)
+        logger.info("Loaded %d questions across %d topics from %s", len(bank), len(bank.topics), path)
+        # Related-question lookups report "not ready" until this finishes
+        bank.build_similarity_index()
+    return bank
+
+
+def reload_question_bank_in_background(path: str) -> threading.Thread:
+    """Load a question bank on a background thread; the old bank serves until it is ready."""
+
+    def run():
+        try:
+            reload_question_bank(path)
+        except Exception:
+            logger.exception("Failed to load question bank from %s", path)
+
+    thread = threading.Thread(target=run, name="question-bank-reload", daemon=True)
+    thread.start()
+    return thread
+
 
+def get_question(question_id: int) -> Optional[dict]:
+    """Get a question record by id."""
+    return _bank.get(question_id)
 
-def generate_questions(topic: str, count: int = 5) -> list:
-    """Generate interview questions for a given topic."""
-    if topic not in QUESTION_TEMPLATES:
-        return []
-    
-    questions = QUESTION_TEMPLATES.get(topic, [])
-    # Return up to 'count' questions, or all if less than count
-    return questions[:count] if len(questions) > count else questions
 
+def get_related_questions(question_id: int, k: int = 5) -> Optional[list]:
+    """Get question records similar to a question, or None while the index is building."""
+    bank = _bank
+    related = bank.related(question_id, k)
+    if related is None:
+        return None
+    return [dict(bank.get(i), score=round(score, 4)) for i, score in related]
@@ -1,9 +1,33 @@
-from fastapi import FastAPI, HTTPException, Depends, Header
+import asyncio
+import json
+import logging
+import random
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field, ValidationError
 from typing import Optional
 from backend import auth
 from backend import interview_engine
+from backend import metrics
+from backend import rate_limit
+from backend.response_cache import ResponseCache
+from backend.scoring import ScoringFailed, ScoringPipeline, ScoringQueueFull
+from backend.sessions import SESSION_SWEEP_INTERVAL_SECONDS, SessionStore
+
+logger = logging.getLogger(__name__)
+
+# Longest answer accepted for a single question, in characters
+MAX_ANSWER_LENGTH = 10000
+
+# Most questions returned by /questions or put in one interview session
+MAX_QUESTION_COUNT = 50
+
+# Most answers accepted in a single scoring request
+MAX_SCORE_BATCH = 1000
+
+# How long a new interview WebSocket has to send its auth message
+WS_AUTH_TIMEOUT_SECONDS = 10
 
 app = FastAPI(title="AI Interview Platform API")
 
@@ -16,6 +40,199 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms and in-flight gauge; outermost so it times everything
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+@app.exception_handler(auth.HashingPoolSaturated)
+async def hashing_pool_saturated_handler(request, exc):
+    """Reject auth requests quickly when the password hashing pool is full."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"}
+    )
+
+
+@app.exception_handler(rate_limit.RateLimited)
+async def rate_limited_handler(request, exc):
+    """Reject auth requests over their rate limit before any password hashing."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+@app.exception_handler(ScoringQueueFull)
+async def scoring_queue_full_handler(request, exc):
+    """Reject scoring requests quickly when the scoring queue is full."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many answers are waiting to be scored, please retry shortly"},
+        headers={"Retry-After": "5"}
+    )
+
+
+@app.exception_handler(ScoringFailed)
+async def scoring_failed_handler(request, exc):
+    """Report a failed scoring batch as a temporary server-side error."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Scoring is temporarily unavailable, please retry shortly"},
+        headers={"Retry-After": "5"}
+    )
+
+
+@app.on_event("startup")
+async def load_question_bank():
+    """Start loading the configured question bank; the built-in bank serves meanwhile."""
+    app.state.question_bank_reload = None
+    if interview_engine.QUESTION_BANK_PATH:
+        app.state.question_bank_reload = interview_engine.reload_question_bank_in_background(
+            interview_engine.QUESTION_BANK_PATH
+        )
+
+
+async def watch_question_bank(path: str, reload):
+    """Reload the question bank in the background whenever its files change."""
+    try:
+        last_mtime = await asyncio.to_thread(interview_engine.question_bank_mtime, path)
+    except OSError:
+        last_mtime = None
+    while True:
+        await asyncio.sleep(interview_engine.QUESTION_BANK_POLL_SECONDS)
+        try:
+            mtime = await asyncio.to_thread(interview_engine.question_bank_mtime, path)
+        except OSError:
+            logger.warning("Cannot stat question bank %s", path)
+            continue
+        # Wait for a running load to finish; the next poll sees the change again
+        if mtime != last_mtime and not reload.is_alive():
+            last_mtime = mtime
+            reload = interview_engine.reload_question_bank_in_background(path)
+
+
+@app.on_event("startup")
+async def start_question_bank_watcher():
+    """Start watching the configured question bank for changes."""
+    app.state.question_bank_watcher = None
+    path = interview_engine.QUESTION_BANK_PATH
+    if path and interview_engine.QUESTION_BANK_POLL_SECONDS > 0:
+        app.state.question_bank_watcher = asyncio.create_task(
+            watch_question_bank(path, app.state.question_bank_reload)
+        )
+
+
+@app.on_event("shutdown")
+async def stop_question_bank_watcher():
+    """Stop watching the question bank."""
+    if app.state.question_bank_watcher is not None:
+        app.state.question_bank_watcher.cancel()
+
+
+async def sweep_sessions():
+    """Periodically drop expired interview sessions."""
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL_SECONDS)
+        session_store.sweep()
+
+
+@app.on_event("startup")
+async def start_session_sweeper():
+    """Start the background session sweep."""
+    app.state.session_sweeper = asyncio.create_task(sweep_sessions())
+
+
+@app.on_event("shutdown")
+async def stop_session_sweeper():
+    """Stop the background session sweep."""
+    app.state.session_sweeper.cancel()
+
+
+async def evict_rate_limits():
+    """Periodically drop idle rate limit keys."""
+    while True:
+        await asyncio.sleep(rate_limit.RATE_LIMIT_SWEEP_INTERVAL_SECONDS)
+        await asyncio.to_thread(auth_admission.evict_idle)
+
+
+@app.on_event("startup")
+async def start_rate_limit_sweeper():
+    """Start the background rate limit eviction."""
+    app.state.rate_limit_sweeper = asyncio.create_task(evict_rate_limits())
+
+
+@app.on_event("shutdown")
+async def stop_rate_limit_sweeper():
+    """Stop the background rate limit eviction."""
+    app.state.rate_limit_sweeper.cancel()
+
+
+async def sync_token_revocations():
+    """Periodically drop cached tokens revoked by any worker."""
+    while True:
+        await asyncio.sleep(auth.REVOCATION_POLL_SECONDS)
+        try:
+            await auth.sync_revocations()
+        except Exception:
+            logger.exception("Failed to sync token revocations")
+
+
+@app.on_event("startup")
+async def start_revocation_sync():
+    """Start the background token revocation sync."""
+    app.state.revocation_sync = asyncio.create_task(sync_token_revocations())
+
+
+@app.on_event("shutdown")
+async def stop_revocation_sync():
+    """Stop the background token revocation sync."""
+    app.state.revocation_sync.cancel()
+
+
+@app.on_event("startup")
+async def start_scoring_pipeline():
+    """Start the answer-scoring workers."""
+    await scoring_pipeline.start()
+
+
+@app.on_event("shutdown")
+async def stop_scoring_pipeline():
+    """Stop the answer-scoring workers."""
+    await scoring_pipeline.stop()
+
+
+@app.on_event("shutdown")
+async def shutdown_auth():
+    """Stop the password hashing workers and close the user store."""
+    auth.password_hasher.shutdown()
+    auth.user_store.close()
+
+
+# Pre-serialized /topics and /questions payloads, rebuilt when the bank changes
+response_cache = ResponseCache()
+interview_engine.add_bank_listener(response_cache.rebuild)
+
+# Server-side interview sessions
+session_store = SessionStore()
+
+# Answer scoring, micro-batched onto a process pool
+scoring_pipeline = ScoringPipeline()
+
+# Per-IP and per-username limits on /signup and /login, checked before bcrypt runs
+auth_admission = rate_limit.AdmissionController(auth.password_hasher)
+
+# Gauges read from the subsystems at scrape time
+metrics.callback("token_cache_hits_total", "Verified-token cache hits", lambda: auth.token_cache.hits, "counter")
+metrics.callback("token_cache_misses_total", "Verified-token cache misses", lambda: auth.token_cache.misses, "counter")
+metrics.callback("password_hash_pending", "bcrypt calls running or queued", lambda: auth.password_hasher.pending)
+metrics.callback("interview_sessions", "Live interview sessions", lambda: len(session_store))
+metrics.callback("interview_session_evictions_total", "Expired or evicted sessions", lambda: session_store.evictions, "counter")
+metrics.callback("interview_sessions_memory_bytes", "Approximate memory held by live sessions", lambda: session_store.memory_bytes)
+metrics.callback("scoring_jobs_pending", "Answers queued or being scored", lambda: scoring_pipeline.pending)
+metrics.callback("question_bank_size", "Questions in the active bank", lambda: len(interview_engine.get_bank()))
+
 
 # Request/Response models
 class SignupRequest(BaseModel):
@@ -46,11 +263,78 @@ class TopicsResponse(BaseModel):
 class QuestionsResponse(BaseModel):
     topic: str
     questions: list
+    question_ids: list
 
 
-# Dependency to verify token
-async def verify_token_dependency(authorization: Optional[str] = Header(None)):
-    """Verify JWT token from Authorization header."""
+class RelatedQuestionsResponse(BaseModel):
+    id: int
+    question: str
+    related: list
+
+
+class CreateSessionRequest(BaseModel):
+    topic: str
+    count: int = Field(5, ge=1, le=MAX_QUESTION_COUNT)
+    difficulty: Optional[str] = None
+    tag: Optional[str] = None
+    seed: Optional[int] = None
+
+
+class SessionResponse(BaseModel):
+    session_id: str
+    topic: str
+    total: int
+    seed: int
+
+
+class SessionQuestionResponse(BaseModel):
+    session_id: str
+    index: int
+    total: int
+    done: bool
+    question_id: Optional[int] = None
+    question: Optional[str] = None
+
+
+class AnswerRequest(BaseModel):
+    answer: str = Field(..., max_length=MAX_ANSWER_LENGTH)
+    question_id: Optional[int] = None
+
+
+class AnswerResponse(BaseModel):
+    session_id: str
+    index: int
+    answered: int
+    total: int
+    done: bool
+    score_job_id: Optional[str] = None
+
+
+class ScoreItem(BaseModel):
+    question_id: int
+    answer: str = Field(..., max_length=MAX_ANSWER_LENGTH)
+
+
+class ScoreRequest(BaseModel):
+    items: list[ScoreItem] = Field(..., max_length=MAX_SCORE_BATCH)
+
+
+class ScoreResponse(BaseModel):
+    results: list
+
+
+class ScoreJobsResponse(BaseModel):
+    job_ids: list
+
+
+class ScoreJobResponse(BaseModel):
+    job_id: str
+    status: str
+    result: Optional[dict] = None
+
+
+def get_bearer_token(authorization: Optional[str] = Header(None)) -> str:
+    """Extract the bearer token from the Authorization header."""
     if not authorization:
         raise HTTPException(status_code=401, detail="Authorization header missing")
     
@@ -61,7 +345,13 @@ async def verify_token_dependency(authorization: Optional[str] = Header(None)):
     except ValueError:
         raise HTTPException(status_code=401, detail="Invalid authorization header format")
     
-    payload = auth.verify_token(token)
+    return token
+
+
+# Dependency to verify token
+async def verify_token_dependency(token: str = Depends(get_bearer_token)):
+    """Verify JWT token from Authorization header."""
+    payload = await auth.verify_token(token)
     if payload is None:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
@@ -74,10 +364,22 @@ async def health_check():
     return {"status": "ok", "message": "AI Interview Platform API is running"}
 
 
+def client_ip(request: Request) -> str:
+    """Address of the connecting client, used as its rate limit key."""
+    return request.client.host if request.client else "unknown"
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/signup", response_model=dict)
-async def signup(request: SignupRequest):
+async def signup(request: SignupRequest, http_request: Request):
     """Register a new user."""
-    result = auth.register_user(
+    await auth_admission.admit(client_ip(http_request), request.username)
+    result = await auth.register_user(
         username=request.username,
         email=request.email,
         password=request.password
@@ -90,9 +392,10 @@ async def signup(request: SignupRequest):
 
 
 @app.post("/login", response_model=TokenResponse)
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, http_request: Request):
     """Login and get JWT token."""
-    user = auth.authenticate_user(request.username, request.password)
+    await auth_admission.admit(client_ip(http_request), request.username)
+    user = await auth.authenticate_user(request.username, request.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
@@ -100,39 +403,332 @@ async def login(request: LoginRequest):
     return TokenResponse(access_token=access_token, token_type="bearer")
 
 
+@app.post("/logout", response_model=dict)
+async def logout(token: str = Depends(get_bearer_token)):
+    """Revoke the current JWT token."""
+    await auth.revoke_token(token)
+    return {"message": "Logged out successfully"}
+
+
 @app.get("/me", response_model=UserResponse)
 async def get_current_user(payload: dict = Depends(verify_token_dependency)):
     """Get current user information."""
     username = payload.get("sub")
-    if not username or username not in auth.users_db:
+    user = await auth.get_user(username) if username else None
+    if not user:
         raise HTTPException(status_code=401, detail="User not found")
     
-    user = auth.users_db[username]
     return UserResponse(username=user["username"], email=user["email"])
 
 
 @app.get("/topics", response_model=TopicsResponse)
-async def get_topics(payload: dict = Depends(verify_token_dependency)):
+async def get_topics(
+    if_none_match: Optional[str] = Header(None),
+    payload: dict = Depends(verify_token_dependency)
+):
     """Get list of available interview topics."""
-    topics = interview_engine.get_topics()
-    return TopicsResponse(topics=topics)
+    return response_cache.topics().respond(if_none_match)
 
 
 @app.get("/questions", response_model=QuestionsResponse)
 async def get_questions(
     topic: str,
-    count: int = 5,
+    count: int = Query(5, ge=1, le=MAX_QUESTION_COUNT),
+    difficulty: Optional[str] = None,
+    tag: Optional[str] = None,
+    seed: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
     payload: dict = Depends(verify_token_dependency)
 ):
-    """Get interview questions for a specific topic."""
+    """Get interview questions for a specific topic, optionally filtered and sampled."""
     if not topic:
         raise HTTPException(status_code=400, detail="Topic parameter is required")
     
-    questions = interview_engine.generate_questions(topic, count)
-    if not questions:
-        raise HTTPException(status_code=404, detail=f"Topic '{topic}' not found")
+    if difficulty is None and tag is None and seed is None:
+        cached = response_cache.questions(topic, count)
+        if cached is not None:
+            return cached.respond(if_none_match)
+    
+    bank = interview_engine.get_bank()
+    question_ids = bank.select(topic, count, difficulty, tag, seed)
+    if not question_ids:
+        if not bank.has_topic(topic):
+            raise HTTPException(status_code=404, detail=f"Topic '{topic}' not found")
+        raise HTTPException(status_code=404, detail=f"No questions match the filters for '{topic}'")
+    
+    questions = [bank.text(i) for i in question_ids]
+    return QuestionsResponse(topic=topic, questions=questions, question_ids=question_ids)
+
+
+@app.get("/questions/{question_id}/related", response_model=RelatedQuestionsResponse)
+async def get_related_questions(
+    question_id: int,
+    k: int = 5,
+    payload: dict = Depends(verify_token_dependency)
+):
+    """Get the questions most similar to a given question."""
+    question = interview_engine.get_question(question_id)
+    if question is None:
+        raise HTTPException(status_code=404, detail=f"Question {question_id} not found")
+    
+    # A full scan of the similarity matrix; NumPy releases the GIL, so run it off the event loop
+    related = await asyncio.to_thread(interview_engine.get_related_questions, question_id, max(0, min(k, 50)))
+    if related is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Related questions are still being indexed",
+            headers={"Retry-After": "5"}
+        )
     
-    return QuestionsResponse(topic=topic, questions=questions)
+    return RelatedQuestionsResponse(id=question_id, question=question["question"], related=related)
+
+
+def get_user_session(session_id: str, payload: dict):
+    """Look up a live session owned by the authenticated user."""
+    session = session_store.get(session_id)
+    if session is None or session.username != payload.get("sub"):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+
+def session_question_response(session) -> SessionQuestionResponse:
+    """Describe the next unanswered question of a session."""
+    return SessionQuestionResponse(
+        session_id=session.session_id,
+        index=session.position,
+        total=session.total,
+        done=session.done,
+        question_id=session.current_question_id(),
+        question=session.current_question()
+    )
+
+
+def start_user_session(username: str, request: CreateSessionRequest) -> SessionResponse:
+    """Create an interview session for a user."""
+    bank = interview_engine.get_bank()
+    seed = request.seed if request.seed is not None else random.randrange(2**31)
+    question_ids = bank.select(request.topic, request.count, request.difficulty, request.tag, seed)
+    if not question_ids:
+        if not bank.has_topic(request.topic):
+            raise HTTPException(status_code=404, detail=f"Topic '{request.topic}' not found")
+        raise HTTPException(status_code=404, detail=f"No questions match the filters for '{request.topic}'")
+    
+    session = session_store.create(username, request.topic, bank, question_ids)
+    return SessionResponse(
+        session_id=session.session_id,
+        topic=session.topic,
+        total=session.total,
+        seed=seed
+    )
+
+
+def record_session_answer(session, request: AnswerRequest, username: str) -> tuple:
+    """Record an answer, queue it for scoring and return (AnswerResponse, scoring job or None)."""
+    if session.done:
+        raise HTTPException(status_code=409, detail="Interview is already complete")
+    if request.question_id is not None and request.question_id != session.current_question_id():
+        raise HTTPException(status_code=409, detail="Answer is not for the current question")
+    
+    rubric = session.bank.rubric(session.current_question_id())
+    index = session.record_answer()
+    try:
+        job = scoring_pipeline.submit(username, rubric, request.answer)
+    except ScoringQueueFull:
+        # The answer is recorded either way; scoring is best effort under load
+        job = None
+    response = AnswerResponse(
+        session_id=session.session_id,
+        index=index,
+        answered=session.position,
+        total=session.total,
+        done=session.done,
+        score_job_id=job.job_id if job is not None else None
+    )
+    return response, job
+
+
+@app.post("/sessions", response_model=SessionResponse)
+async def create_session(
+    request: CreateSessionRequest,
+    payload: dict = Depends(verify_token_dependency)
+):
+    """Start an interview session for a topic."""
+    return start_user_session(payload.get("sub"), request)
+
+
+@app.get("/sessions/{session_id}/next", response_model=SessionQuestionResponse)
+async def get_next_question(session_id: str, payload: dict = Depends(verify_token_dependency)):
+    """Get the next unanswered question of a session."""
+    session = get_user_session(session_id, payload)
+    return session_question_response(session)
+
+
+@app.post("/sessions/{session_id}/answers", response_model=AnswerResponse)
+async def submit_answer(
+    session_id: str,
+    request: AnswerRequest,
+    payload: dict = Depends(verify_token_dependency)
+):
+    """Answer the current question of a session and advance to the next one."""
+    session = get_user_session(session_id, payload)
+    response, _ = record_session_answer(session, request, payload.get("sub"))
+    return response
+
+
+@app.websocket("/ws/interview")
+async def interview_stream(websocket: WebSocket):
+    """Run an interview over a single WebSocket connection.
+    
+    The client authenticates once with {"type": "auth", "token": ...}, then
+    sends "start" (same fields as POST /sessions), "resume" (session_id) and
+    "answer" (answer, optional question_id) messages. The server pushes each
+    question as the session advances, acknowledges answers, and pushes each
+    score as soon as it is ready.
+    """
+    await websocket.accept()
+    try:
+        message = json.loads(await asyncio.wait_for(websocket.receive_text(), WS_AUTH_TIMEOUT_SECONDS))
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, KeyError, ValueError):
+        message = None
+    payload = None
+    token = ""
+    if isinstance(message, dict) and message.get("type") == "auth":
+        token = str(message.get("token", ""))
+        payload = await auth.verify_token(token)
+    if payload is None:
+        await websocket.close(code=1008, reason="Invalid or expired token")
+        return
+    username = payload.get("sub")
+    
+    send_lock = asyncio.Lock()
+    score_tasks = set()
+    session = None
+    
+    async def send(data: dict):
+        async with send_lock:
+            await websocket.send_json(data)
+    
+    async def send_question():
+        if session.done:
+            await send({
+                "type": "complete",
+                "session_id": session.session_id,
+                "answered": session.position,
+                "total": session.total
+            })
+        else:
+            await send({"type": "question", **session_question_response(session).model_dump()})
+    
+    async def send_score(job, session_id: str, index: int):
+        # Shielded: the future is the job's own, and cancelling it on disconnect must not touch the job
+        result = await asyncio.shield(job.future)
+        await send({
+            "type": "score",
+            "session_id": session_id,
+            "index": index,
+            "job_id": job.job_id,
+            "status": job.status,
+            "result": result
+        })
+    
+    await send({"type": "ready", "username": username})
+    try:
+        while True:
+            try:
+                text = await websocket.receive_text()
+            except KeyError:
+                # Binary frames carry "bytes" rather than "text"
+                await send({"type": "error", "status": 422, "detail": "Invalid message"})
+                continue
+            # Re-check every message so logout and user deletion end open sockets too
+            if await auth.verify_token(token) is None:
+                await websocket.close(code=1008, reason="Invalid or expired token")
+                break
+            try:
+                message = json.loads(text)
+                if not isinstance(message, dict):
+                    raise ValueError("Message must be a JSON object")
+                kind = message.get("type")
+                if kind == "start":
+                    response = start_user_session(username, CreateSessionRequest.model_validate(message))
+                    session = session_store.get(response.session_id)
+                    await send({"type": "session", **response.model_dump()})
+                    await send_question()
+                elif kind == "resume":
+                    session = get_user_session(str(message.get("session_id", "")), payload)
+                    await send_question()
+                elif kind == "answer":
+                    if session is None:
+                        raise HTTPException(status_code=409, detail="No interview in progress")
+                    response, job = record_session_answer(
+                        session, AnswerRequest.model_validate(message), username
+                    )
+                    await send({"type": "answer_received", **response.model_dump()})
+                    if job is not None:
+                        task = asyncio.create_task(send_score(job, session.session_id, response.index))
+                        score_tasks.add(task)
+                        task.add_done_callback(score_tasks.discard)
+                    await send_question()
+                else:
+                    raise HTTPException(status_code=400, detail=f"Unknown message type: {kind!r}")
+            except HTTPException as exc:
+                await send({"type": "error", "status": exc.status_code, "detail": exc.detail})
+            except (ValueError, ValidationError):
+                await send({"type": "error", "status": 422, "detail": "Invalid message"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in score_tasks:
+            task.cancel()
+
+
+def get_rubrics(items: list) -> list:
+    """Look up the rubric of every item's question."""
+    bank = interview_engine.get_bank()
+    rubrics = []
+    for item in items:
+        if not 0 <= item.question_id < len(bank):
+            raise HTTPException(status_code=404, detail=f"Question {item.question_id} not found")
+        rubrics.append(bank.rubric(item.question_id))
+    return rubrics
+
+
+@app.post("/score", response_model=ScoreResponse)
+async def score_answers(request: ScoreRequest, payload: dict = Depends(verify_token_dependency)):
+    """Score a batch of answers and wait for the results."""
+    rubrics = get_rubrics(request.items)
+    results = await scoring_pipeline.score(
+        payload.get("sub"),
+        [(rubric, item.answer) for rubric, item in zip(rubrics, request.items)]
+    )
+    return ScoreResponse(results=results)
+
+
+@app.post("/score/jobs", response_model=ScoreJobsResponse, status_code=202)
+async def submit_score_jobs(request: ScoreRequest, payload: dict = Depends(verify_token_dependency)):
+    """Queue a batch of answers for scoring; poll each job for its result."""
+    rubrics = get_rubrics(request.items)
+    username = payload.get("sub")
+    jobs = scoring_pipeline.submit_many(
+        username, [(rubric, item.answer) for rubric, item in zip(rubrics, request.items)]
+    )
+    return ScoreJobsResponse(job_ids=[job.job_id for job in jobs])
+
+
+@app.get("/score/jobs/{job_id}", response_model=ScoreJobResponse)
+async def get_score_job(job_id: str, payload: dict = Depends(verify_token_dependency)):
+    """Get the status and, once done, the result of a scoring job.
+
+    Jobs live in the memory of the worker process that queued them; with
+    several uvicorn workers, clients must poll over the same connection or
+    behind a load balancer with sticky sessions.
+    """
+    job = scoring_pipeline.get_job(job_id)
+    if job is None or job.username != payload.get("sub"):
+        raise HTTPException(status_code=404, detail="Scoring job not found")
+    return ScoreJobResponse(job_id=job.job_id, status=job.status, result=job.result)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,300 @@
+"""
+Lightweight in-process metrics exposed in the Prometheus text format.
+
+Histograms use fixed buckets and a single lock per metric, so recording a
+value costs a bisect and a few integer increments. MetricsMiddleware records
+per-route latency and in-flight requests for every HTTP request, and
+SlowRequestMonitor can optionally log the event loop's stack while a request
+runs longer than a threshold.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Request latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets for sub-millisecond operations, in seconds
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+# Log the event loop's stack for requests slower than this; unset disables it
+SLOW_REQUEST_THRESHOLD_MS = os.getenv("SLOW_REQUEST_THRESHOLD_MS")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """Histogram with fixed bucket bounds, optionally split by labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        """Record one value."""
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """Record the duration of a block of code."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> list:
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        lines = []
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Value that can go up and down, optionally split by labels."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> list:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class Counter(Gauge):
+    """Monotonically increasing value, optionally split by labels."""
+
+    kind = "counter"
+
+
+class CallbackMetric:
+    """Metric whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, help: str, callback: Callable[[], float], kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.callback = callback
+
+    def render(self) -> list:
+        return [f"{self.name} {_format_value(self.callback())}"]
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        """Add a metric, replacing any earlier metric with the same name."""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                logger.exception("Failed to render metric %s", metric.name)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def histogram(name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+    """Create and register a histogram."""
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+def gauge(name: str, help: str, labelnames: tuple = ()) -> Gauge:
+    """Create and register a gauge."""
+    return REGISTRY.register(Gauge(name, help, labelnames))
+
+
+def counter(name: str, help: str, labelnames: tuple = ()) -> Counter:
+    """Create and register a counter."""
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def callback(name: str, help: str, fn: Callable[[], float], kind: str = "gauge") -> CallbackMetric:
+    """Create and register a metric read from a callback."""
+    return REGISTRY.register(CallbackMetric(name, help, fn, kind))
+
+
+REQUEST_LATENCY = histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+REQUESTS_IN_FLIGHT = gauge("http_requests_in_flight", "HTTP requests being served")
+
+
+class SlowRequestMonitor:
+    """Background sampler that logs the event loop's stack during slow requests.
+
+    Every interval it looks at the requests in flight. The first time a
+    request passes the threshold, it logs the current stack of the event
+    loop thread that accepted it, which shows what is holding the loop up.
+    """
+
+    def __init__(self, threshold: float, interval: Optional[float] = None):
+        self.threshold = threshold
+        self.interval = interval or max(threshold / 4, 0.01)
+        # token -> [start, method, path, thread id, reported]
+        self._requests = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="slow-request-monitor", daemon=True)
+            self._thread.start()
+
+    def begin(self, token: object, method: str, path: str) -> None:
+        with self._lock:
+            self._requests[token] = [time.perf_counter(), method, path, threading.get_ident(), False]
+
+    def end(self, token: object) -> None:
+        with self._lock:
+            self._requests.pop(token, None)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            with self._lock:
+                slow = [r for r in self._requests.values() if not r[4] and now - r[0] >= self.threshold]
+                for request in slow:
+                    request[4] = True
+            if not slow:
+                continue
+            frames = sys._current_frames()
+            for start, method, path, thread_id, _ in slow:
+                frame = frames.get(thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame is not None else "<no frame>\n"
+                logger.warning(
+                    "Slow request %s %s running for %.0f ms; event loop stack:\n%s",
+                    method, path, (now - start) * 1000, stack
+                )
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and in-flight counts per route template."""
+
+    def __init__(self, app, slow_request_threshold_ms: Optional[str] = SLOW_REQUEST_THRESHOLD_MS):
+        self.app = app
+        self._route_paths = None
+        self.monitor = None
+        if slow_request_threshold_ms:
+            self.monitor = SlowRequestMonitor(float(slow_request_threshold_ms) / 1000)
+            self.monitor.start()
+
+    def _route_label(self, scope) -> str:
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._route_paths is None:
+            # Resolve endpoints to route templates once; keeps label cardinality bounded
+            router = scope["app"].router
+            self._route_paths = {r.endpoint: r.path for r in router.routes if hasattr(r, "endpoint")}
+        return self._route_paths.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = object()
+        if self.monitor is not None:
+            self.monitor.begin(token, scope["method"], scope["path"])
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            if self.monitor is not None:
+                self.monitor.end(token)
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start, scope["method"], self._route_label(scope), status
+            )
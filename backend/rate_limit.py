@@ -0,0 +1,248 @@
+"""
+Rate limiting and admission control for the authentication endpoints.
+
+Every key (a client IP or a username) gets a token bucket, which absorbs
+short bursts, and a sliding-window counter, which caps sustained volume.
+Limits are checked before any bcrypt work is done. State is kept in process
+memory by default. When RATE_LIMIT_DB_PATH is set, it is kept in a shared
+SQLite file so that limits hold across uvicorn workers.
+"""
+
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Optional
+from backend import metrics
+from backend.auth import HashingPoolSaturated
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") != "0"
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH")
+
+# Most keys tracked per limiter; least recently seen keys are dropped first
+MAX_TRACKED_KEYS = 100000
+
+# How often idle keys are evicted
+RATE_LIMIT_SWEEP_INTERVAL_SECONDS = 60
+
+# Refuse new auth work once the hashing backlog passes this share of its capacity
+ADMISSION_BACKLOG_FRACTION = 0.75
+
+# rate: tokens per second; burst: bucket size; window_limit: requests per window seconds
+RateLimit = namedtuple("RateLimit", ["rate", "burst", "window", "window_limit"])
+
+IP_LIMIT = RateLimit(rate=1.0, burst=20, window=3600, window_limit=1000)
+USERNAME_LIMIT = RateLimit(rate=0.2, burst=5, window=900, window_limit=30)
+
+AUTH_REJECTED = metrics.counter(
+    "auth_requests_rejected_total", "Auth requests refused by admission control", ("reason",)
+)
+
+
+class RateLimited(Exception):
+    """Raised when a request is refused; retry_after is in seconds."""
+
+    def __init__(self, retry_after: float, detail: str = "Too many requests, please retry later"):
+        super().__init__(detail)
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+def apply_limit(limit: RateLimit, record: Optional[tuple], now: float) -> tuple:
+    """Charge one request against a key's state.
+
+    record is (tokens, updated, window_start, count, previous_count), or None
+    for an unseen key. Returns (new record, retry_after), where retry_after
+    is 0 when the request is allowed.
+    """
+    if record is None:
+        tokens, updated, window_start, count, previous = limit.burst, now, now - now % limit.window, 0, 0
+    else:
+        tokens, updated, window_start, count, previous = record
+
+    tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+    current_start = now - now % limit.window
+    if current_start != window_start:
+        previous = count if current_start - window_start == limit.window else 0
+        count = 0
+        window_start = current_start
+    # Sliding window estimate: the previous window's count, weighted by its overlap
+    estimate = previous * (1 - (now - current_start) / limit.window) + count
+
+    if tokens < 1:
+        return (tokens, now, window_start, count, previous), (1 - tokens) / limit.rate
+    if estimate + 1 > limit.window_limit:
+        return (tokens, now, window_start, count, previous), current_start + limit.window - now
+    return (tokens - 1, now, window_start, count + 1, previous), 0.0
+
+
+def is_idle(limit: RateLimit, record: tuple, now: float) -> bool:
+    """Check whether a key's state has decayed back to that of an unseen key."""
+    return now - record[1] >= max(limit.burst / limit.rate, 2 * limit.window)
+
+
+class RateLimiter:
+    """Per-key limiter kept in process memory, bounded to max_keys keys."""
+
+    def __init__(self, limit: RateLimit, max_keys: int = MAX_TRACKED_KEYS):
+        self.limit = limit
+        self.max_keys = max_keys
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, key: str) -> float:
+        """Charge a request to a key; returns 0 if allowed, else seconds to wait."""
+        now = time.time()
+        with self._lock:
+            record, retry_after = apply_limit(self.limit, self._records.get(key), now)
+            self._records[key] = record
+            self._records.move_to_end(key)
+            while len(self._records) > self.max_keys:
+                self._records.popitem(last=False)
+        return retry_after
+
+    async def acheck(self, key: str) -> float:
+        return self.check(key)
+
+    def evict_idle(self) -> int:
+        """Drop keys whose state has fully decayed and return how many were dropped."""
+        # Every check moves its key to the back, so idle keys sit at the front
+        now = time.time()
+        dropped = 0
+        with self._lock:
+            while self._records:
+                record = next(iter(self._records.values()))
+                if not is_idle(self.limit, record, now):
+                    break
+                self._records.popitem(last=False)
+                dropped += 1
+        return dropped
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """Per-key limiter kept in a SQLite file shared by every worker process."""
+
+    def __init__(self, limit: RateLimit, path: str, namespace: str):
+        self.limit = limit
+        self.path = path
+        self.namespace = namespace
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                window_start REAL NOT NULL,
+                count INTEGER NOT NULL,
+                previous INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS rate_limits_updated ON rate_limits (updated)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not thread-safe
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def check(self, key: str) -> float:
+        key = f"{self.namespace}:{key}"
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated, window_start, count, previous FROM rate_limits WHERE key = ?",
+                (key,)
+            ).fetchone()
+            record, retry_after = apply_limit(self.limit, row, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits "
+                "(key, tokens, updated, window_start, count, previous) VALUES (?, ?, ?, ?, ?, ?)",
+                (key,) + record
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return retry_after
+
+    async def acheck(self, key: str) -> float:
+        return await asyncio.to_thread(self.check, key)
+
+    def evict_idle(self) -> int:
+        cutoff = time.time() - max(self.limit.burst / self.limit.rate, 2 * self.limit.window)
+        cursor = self._connection().execute(
+            "DELETE FROM rate_limits WHERE key LIKE ? AND updated <= ?",
+            (f"{self.namespace}:%", cutoff)
+        )
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM rate_limits WHERE key LIKE ?", (f"{self.namespace}:%",)
+        ).fetchone()[0]
+
+
+def create_rate_limiter(limit: RateLimit, namespace: str, path: Optional[str] = RATE_LIMIT_DB_PATH) -> RateLimiter:
+    """Create a shared SQLite limiter when a path is given, else an in-memory one."""
+    if path:
+        return SQLiteRateLimiter(limit, path, namespace)
+    return RateLimiter(limit)
+
+
+class AdmissionController:
+    """Decide whether an auth request may spend CPU on bcrypt.
+
+    Requests are refused with HashingPoolSaturated (503) when the password
+    hashing backlog is close to full, and with RateLimited (429) when the
+    client IP or the target username is over its limit.
+    """
+
+    def __init__(
+        self,
+        hasher,
+        ip_limiter: Optional[RateLimiter] = None,
+        username_limiter: Optional[RateLimiter] = None,
+        enabled: bool = RATE_LIMIT_ENABLED,
+        backlog_fraction: float = ADMISSION_BACKLOG_FRACTION
+    ):
+        self.hasher = hasher
+        self.ip_limiter = ip_limiter or create_rate_limiter(IP_LIMIT, "ip")
+        self.username_limiter = username_limiter or create_rate_limiter(USERNAME_LIMIT, "user")
+        self.enabled = enabled
+        self.backlog_fraction = backlog_fraction
+
+    async def admit(self, ip: str, username: str) -> None:
+        """Raise HashingPoolSaturated or RateLimited unless the request may proceed."""
+        if not self.enabled:
+            return
+        if self.hasher.pending >= self.hasher.max_pending * self.backlog_fraction:
+            AUTH_REJECTED.inc("busy")
+            raise HashingPoolSaturated("Password hashing backlog is nearly full")
+        # Check the IP first so a flood from one client cannot lock out a username
+        retry_after = await self.ip_limiter.acheck(ip)
+        if retry_after:
+            AUTH_REJECTED.inc("ip")
+            raise RateLimited(math.ceil(retry_after))
+        retry_after = await self.username_limiter.acheck(username)
+        if retry_after:
+            AUTH_REJECTED.inc("username")
+            raise RateLimited(math.ceil(retry_after))
+
+    def evict_idle(self) -> int:
+        """Drop idle keys from both limiters."""
+        return self.ip_limiter.evict_idle() + self.username_limiter.evict_idle()
@@ -0,0 +1,87 @@
+"""
+Pre-serialized responses for the topic and question endpoints.
+
+Payloads are encoded to bytes once whenever the question bank is loaded or
+changed, and served with strong ETags so repeat requests can be answered with
+304 Not Modified.
+"""
+
+import hashlib
+import json
+from typing import Optional
+from fastapi import Response
+from backend import interview_engine
+
+# Largest question count that gets a pre-serialized payload per topic
+MAX_CACHED_COUNT = 20
+
+# Responses are per user (they require a token) but identical for everyone
+CACHE_CONTROL = "private, max-age=60"
+
+
+class CachedResponse:
+    """A serialized JSON body and its strong ETag."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, content):
+        # Same encoding as FastAPI's JSONResponse
+        self.body = json.dumps(
+            content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Check an If-None-Match header value against this ETag."""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") == self.etag:
+                return True
+        return False
+
+    def respond(self, if_none_match: Optional[str] = None) -> Response:
+        """Build a 200 response, or a bodiless 304 when the client copy is current."""
+        headers = {"ETag": self.etag, "Cache-Control": CACHE_CONTROL}
+        if self.matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """Pre-serialized /topics and /questions payloads for the current question bank."""
+
+    def __init__(self):
+        # (topics payload, {(topic, count): payload}, {topic: question count})
+        self._state = (None, {}, {})
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Re-serialize every payload from the interview engine."""
+        bank = interview_engine.get_bank()
+        topics = CachedResponse({"topics": bank.topics})
+        questions = {}
+        sizes = {}
+        for topic in bank.topics:
+            ids = bank.select(topic, MAX_CACHED_COUNT)
+            texts = [bank.text(i) for i in ids]
+            sizes[topic] = bank.count(topic)
+            for count in range(1, len(ids) + 1):
+                questions[(topic, count)] = CachedResponse(
+                    {"topic": topic, "questions": texts[:count], "question_ids": ids[:count]}
+                )
+        # Swap in the new payloads in one step so readers never see a partial build
+        self._state = (topics, questions, sizes)
+
+    def topics(self) -> CachedResponse:
+        """Return the cached /topics payload."""
+        return self._state[0]
+
+    def questions(self, topic: str, count: int) -> Optional[CachedResponse]:
+        """Return the cached /questions payload, or None if it is not pre-serialized."""
+        _, questions, sizes = self._state
+        size = sizes.get(topic)
+        if size is None or count <= 0:
+            return None
+        return questions.get((topic, min(count, size)))
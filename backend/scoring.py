@@ -0,0 +1,298 @@
+"""
+Rubric-based answer scoring.
+
+A rubric is a tuple of concepts, and each concept is a tuple of alternative
+keywords (single words or short phrases). An answer scores the fraction of
+concepts for which it mentions at least one keyword.
+
+Scoring runs in micro-batches on a process pool. A batch is matched in one
+pass with NumPy: its rubrics form a sparse (concept, keyword) matrix, the
+answers form a boolean (answer, keyword) hit matrix, and each concept's hit
+is a max over its keywords.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional
+import numpy as np
+from backend.similarity import stem, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Scoring processes per uvicorn worker; by default half the CPUs split across
+# WEB_CONCURRENCY uvicorn workers, leaving the rest for bcrypt and the event loops
+SCORING_WORKERS = int(os.getenv(
+    "SCORING_WORKERS",
+    str(max(1, (os.cpu_count() or 1) // (2 * max(1, int(os.getenv("WEB_CONCURRENCY", "1"))))))
+))
+# Largest number of answers scored in one batch
+SCORING_BATCH_SIZE = 256
+# How long the first queued answer waits for a batch to fill up
+SCORING_MAX_WAIT_SECONDS = 0.02
+# Maximum number of queued or running scoring jobs
+SCORING_MAX_PENDING = int(os.getenv("SCORING_MAX_PENDING", "100000"))
+# How long finished job results stay available for polling
+SCORING_RESULT_TTL_SECONDS = 600
+# Most finished job results kept for polling; the oldest are dropped first
+SCORING_MAX_FINISHED_JOBS = int(os.getenv("SCORING_MAX_FINISHED_JOBS", "100000"))
+
+# Longest keyword phrase matched, in words
+MAX_KEYWORD_WORDS = 3
+
+# Words that describe the task rather than its subject; ignored when deriving rubrics
+RUBRIC_IGNORED_WORDS = frozenset(
+    "explain describe difference differences between example provide work works "
+    "key concept concepts use using used common would design"
+    .split()
+)
+
+
+class ScoringQueueFull(Exception):
+    """Raised when too many scoring jobs are pending."""
+
+
+class ScoringFailed(Exception):
+    """Raised when a scoring batch fails in the worker pool."""
+
+
+def _terms(text: str) -> set:
+    tokens = [stem(t) for t in tokenize(text)]
+    terms = set(tokens)
+    for n in range(2, MAX_KEYWORD_WORDS + 1):
+        terms.update(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+    return terms
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Normalize a keyword the same way answers are tokenized."""
+    return " ".join(stem(t) for t in tokenize(keyword))
+
+
+def normalize_rubric(rubric: Iterable) -> tuple:
+    """Turn a list of concepts (strings or lists of alternatives) into a rubric tuple."""
+    concepts = []
+    for concept in rubric:
+        alternatives = [concept] if isinstance(concept, str) else concept
+        keywords = tuple(k for k in (normalize_keyword(a) for a in alternatives) if k)
+        if keywords:
+            concepts.append(keywords)
+    return tuple(concepts)
+
+
+def derive_rubric(question: str) -> tuple:
+    """Build a fallback rubric from the subject words of a question."""
+    words = []
+    for token in tokenize(question):
+        token = stem(token)
+        if token not in RUBRIC_IGNORED_WORDS and token not in words:
+            words.append(token)
+    return tuple((word,) for word in words)
+
+
+def score_batch(items: list) -> list:
+    """Score a batch of (rubric, answer) pairs.
+
+    Returns one {"score", "matched", "missing"} dict per pair.
+    """
+    vocab = {}
+    pair_concepts, pair_keywords = [], []
+    concept_rows, concept_labels = [], []
+    for row, (rubric, _) in enumerate(items):
+        for keywords in rubric:
+            concept = len(concept_rows)
+            concept_rows.append(row)
+            concept_labels.append(keywords[0])
+            for keyword in keywords:
+                pair_concepts.append(concept)
+                pair_keywords.append(vocab.setdefault(keyword, len(vocab)))
+
+    hits = np.zeros((len(items), max(1, len(vocab))), dtype=bool)
+    for row, (_, answer) in enumerate(items):
+        found = [vocab[term] for term in _terms(answer) if term in vocab]
+        hits[row, found] = True
+
+    concept_rows = np.asarray(concept_rows, dtype=np.intp)
+    pair_concepts = np.asarray(pair_concepts, dtype=np.intp)
+    pair_keywords = np.asarray(pair_keywords, dtype=np.intp)
+    covered = np.zeros(len(concept_rows), dtype=bool)
+    np.logical_or.at(covered, pair_concepts, hits[concept_rows[pair_concepts], pair_keywords])
+    totals = np.bincount(concept_rows, minlength=len(items))
+    matched = np.bincount(concept_rows, weights=covered, minlength=len(items))
+    scores = np.divide(matched, totals, out=np.zeros(len(items)), where=totals > 0)
+
+    results = [{"score": round(float(score), 4), "matched": [], "missing": []} for score in scores]
+    for concept, row in enumerate(concept_rows.tolist()):
+        key = "matched" if covered[concept] else "missing"
+        results[row][key].append(concept_labels[concept])
+    return results
+
+
+class ScoringJob:
+    """One answer waiting for, or holding, its score."""
+
+    __slots__ = ("job_id", "username", "rubric", "answer", "status", "result", "future", "finished_at")
+
+    def __init__(self, job_id: Optional[str], username: str, rubric: tuple, answer: str, future):
+        self.job_id = job_id
+        self.username = username
+        self.rubric = rubric
+        self.answer = answer
+        self.status = "pending"
+        self.result: Optional[dict] = None
+        self.future = future
+        self.finished_at: Optional[float] = None
+
+
+class ScoringPipeline:
+    """Queue answers and score them in micro-batches on a process pool.
+
+    A dispatcher task collects up to batch_size jobs, waiting at most
+    max_wait for a batch to fill, and hands each batch to the pool. At most
+    one batch per worker is in flight.
+
+    Jobs submitted for polling are kept in process memory, so with several
+    uvicorn workers a job can only be looked up in the worker that queued it.
+    """
+
+    def __init__(
+        self,
+        workers: int = SCORING_WORKERS,
+        batch_size: int = SCORING_BATCH_SIZE,
+        max_wait: float = SCORING_MAX_WAIT_SECONDS,
+        max_pending: int = SCORING_MAX_PENDING,
+        result_ttl: float = SCORING_RESULT_TTL_SECONDS,
+        max_finished: int = SCORING_MAX_FINISHED_JOBS
+    ):
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.max_finished = max_finished
+        self.pending = 0
+        # Polled jobs by id: queued or running, and finished in finishing order
+        self._jobs = {}
+        self._finished = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start the dispatcher and the worker pool."""
+        self._queue = asyncio.Queue()
+        # Spawn rather than fork: the server already runs threads (bcrypt pool, bank reloads)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self) -> None:
+        """Stop dispatching and shut down the worker pool."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, username: str, rubric: tuple, answer: str) -> ScoringJob:
+        """Queue an answer for scoring and return its job, which can be polled by id."""
+        return self.submit_many(username, [(rubric, answer)])[0]
+
+    def submit_many(self, username: str, items: list, poll: bool = True) -> list:
+        """Queue (rubric, answer) pairs for scoring and return their jobs.
+
+        Either every pair is queued or, when the queue has no room for all
+        of them, none is. Jobs get an id and can be looked up with get_job
+        only when poll is true.
+        """
+        if self._queue is None:
+            raise RuntimeError("Scoring pipeline is not running")
+        if self.pending + len(items) > self.max_pending:
+            raise ScoringQueueFull("Too many answers are waiting to be scored")
+        self._prune()
+        loop = asyncio.get_running_loop()
+        jobs = []
+        for rubric, answer in items:
+            job_id = secrets.token_urlsafe(12) if poll else None
+            job = ScoringJob(job_id, username, rubric, answer, loop.create_future())
+            if poll:
+                self._jobs[job_id] = job
+            self.pending += 1
+            self._queue.put_nowait(job)
+            jobs.append(job)
+        return jobs
+
+    async def score(self, username: str, items: list) -> list:
+        """Score (rubric, answer) pairs and wait for all of the results."""
+        jobs = self.submit_many(username, items, poll=False)
+        results = await asyncio.gather(*(job.future for job in jobs))
+        if any(result is None for result in results):
+            raise ScoringFailed("Scoring failed")
+        return list(results)
+
+    def get_job(self, job_id: str) -> Optional[ScoringJob]:
+        """Look up a job that is pending or finished recently in this process."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = self._finished.get(job_id)
+        return job
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.result_ttl
+        while self._finished:
+            job = next(iter(self._finished.values()))
+            if job.finished_at > cutoff and len(self._finished) <= self.max_finished:
+                break
+            self._finished.popitem(last=False)
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.workers)
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await slots.acquire()
+            task = asyncio.create_task(self._run_batch(batch))
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _run_batch(self, batch: list) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self._executor, score_batch, [(job.rubric, job.answer) for job in batch]
+            )
+        except Exception:
+            logger.exception("Scoring batch of %d answers failed", len(batch))
+            for job in batch:
+                self._finish(job, "failed", None)
+            return
+        for job, result in zip(batch, results):
+            self._finish(job, "done", result)
+
+    def _finish(self, job: ScoringJob, status: str, result: Optional[dict]) -> None:
+        job.status = status
+        job.result = result
+        job.answer = None
+        job.finished_at = time.monotonic()
+        self.pending -= 1
+        # A waiter that gave up cancels the future; the rest of the batch still resolves
+        if not job.future.done():
+            job.future.set_result(result)
+        if self._jobs.pop(job.job_id, None) is not None:
+            self._finished[job.job_id] = job
+            self._prune()
@@ -0,0 +1,169 @@
+"""
+Server-side interview sessions.
+
+A session references its questions by id in the question bank that was
+active when it was created, so it holds no copies of question text. A bank
+replaced by a reload drops its similarity index but stays alive until its
+last session ends. Answer text is handed to the scoring pipeline and not
+kept; a session only tracks how many questions have been answered. Sessions
+live in a sharded in-memory store with one lock per shard. They expire after
+SESSION_TTL_SECONDS without activity, and the least recently used sessions
+are evicted when a shard is full.
+"""
+
+import os
+import secrets
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Optional
+
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "500000"))
+SESSION_SHARDS = 64
+
+# How often the background sweep drops expired sessions
+SESSION_SWEEP_INTERVAL_SECONDS = 60
+
+
+class InterviewSession:
+    """State of one interview: its questions and progress."""
+
+    __slots__ = ("session_id", "username", "topic", "bank", "question_ids", "answered", "expires_at")
+
+    def __init__(self, session_id: str, username: str, topic: str, bank, question_ids, expires_at: float):
+        self.session_id = session_id
+        self.username = username
+        self.topic = topic
+        self.bank = bank
+        self.question_ids = array("I", question_ids)
+        self.answered = 0
+        self.expires_at = expires_at
+
+    @property
+    def total(self) -> int:
+        return len(self.question_ids)
+
+    @property
+    def position(self) -> int:
+        """Index of the next unanswered question."""
+        return self.answered
+
+    @property
+    def done(self) -> bool:
+        return self.answered >= len(self.question_ids)
+
+    def current_question_id(self) -> Optional[int]:
+        """Id of the next unanswered question, or None when the interview is over."""
+        if self.done:
+            return None
+        return self.question_ids[self.answered]
+
+    def current_question(self) -> Optional[str]:
+        """Text of the next unanswered question, or None when the interview is over."""
+        question_id = self.current_question_id()
+        return None if question_id is None else self.bank.text(question_id)
+
+    def record_answer(self) -> int:
+        """Mark the current question answered and return its index."""
+        if self.done:
+            raise ValueError("Interview is already complete")
+        self.answered += 1
+        return self.answered - 1
+
+    def size_bytes(self) -> int:
+        """Approximate memory held by this session, excluding the shared bank."""
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(self.session_id)
+            + sys.getsizeof(self.question_ids)
+        )
+
+
+class SessionStore:
+    """Sharded session store with sliding TTL and per-shard LRU eviction.
+
+    Every access pushes a session to the back of its shard and extends its
+    expiry by the same TTL. LRU order and expiry order therefore match, and
+    expired sessions can be dropped from the front of each shard without a
+    scan.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = MAX_SESSIONS,
+        ttl: float = SESSION_TTL_SECONDS,
+        shards: int = SESSION_SHARDS
+    ):
+        self.ttl = ttl
+        self.max_per_shard = max(1, max_sessions // shards)
+        self.evictions = 0
+        # Approximate bytes held by live sessions, kept current on every add and drop
+        self.memory_bytes = 0
+        self._shards = [OrderedDict() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def _shard_index(self, session_id: str) -> int:
+        return hash(session_id) % len(self._shards)
+
+    def _evict_oldest(self, shard: OrderedDict) -> None:
+        _, session = shard.popitem(last=False)
+        self.memory_bytes -= session.size_bytes()
+        self.evictions += 1
+
+    def _evict_expired(self, shard: OrderedDict, now: float) -> None:
+        while shard:
+            session = next(iter(shard.values()))
+            if session.expires_at > now:
+                break
+            self._evict_oldest(shard)
+
+    def create(self, username: str, topic: str, bank, question_ids) -> InterviewSession:
+        """Start a session for a user over the given question ids."""
+        session_id = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        session = InterviewSession(
+            session_id, username, sys.intern(topic), bank, question_ids, now + self.ttl
+        )
+        i = self._shard_index(session_id)
+        with self._locks[i]:
+            shard = self._shards[i]
+            self._evict_expired(shard, now)
+            while len(shard) >= self.max_per_shard:
+                self._evict_oldest(shard)
+            shard[session_id] = session
+            self.memory_bytes += session.size_bytes()
+        return session
+
+    def get(self, session_id: str) -> Optional[InterviewSession]:
+        """Look up a live session and extend its expiry."""
+        now = time.monotonic()
+        i = self._shard_index(session_id)
+        with self._locks[i]:
+            shard = self._shards[i]
+            session = shard.get(session_id)
+            if session is None:
+                return None
+            if session.expires_at <= now:
+                del shard[session_id]
+                self.memory_bytes -= session.size_bytes()
+                self.evictions += 1
+                return None
+            session.expires_at = now + self.ttl
+            shard.move_to_end(session_id)
+            return session
+
+    def sweep(self) -> int:
+        """Drop expired sessions from every shard and return how many were dropped."""
+        now = time.monotonic()
+        before = self.evictions
+        for lock, shard in zip(self._locks, self._shards):
+            with lock:
+                self._evict_expired(shard, now)
+        return self.evictions - before
+
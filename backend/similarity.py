@@ -0,0 +1,258 @@
+"""
+Question similarity index for near-duplicate detection and related questions.
+
+Each question is embedded as a signed, hashed bag of stemmed word unigrams
+and bigrams. The index keeps these raw counts in a dense NumPy matrix along
+with per-bucket document frequencies, and weights them by IDF when scoring, so
+template words shared by many questions ("explain", "difference between")
+count for little and subject words dominate. Every query is a blocked matrix
+product, which keeps memory bounded no matter how large the bank is.
+
+Run as a module to write a near-duplicate report for a question bank:
+
+    python -m backend.similarity --bank questions.jsonl --threshold 0.85
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import zlib
+from typing import Iterable, Iterator, Optional
+import numpy as np
+
+# Width of the hashed feature vectors; a power of two. Memory is 4 bytes per
+# question per dimension, and lookups scale linearly with it.
+VECTOR_DIM = int(os.getenv("SIMILARITY_VECTOR_DIM", "1024"))
+
+# Rows of the index vectorized or scored per matrix block
+CHUNK_SIZE = 8192
+
+# Upper bound on the size of a query-by-block score matrix in top_k
+MAX_SCORE_BLOCK = 1 << 22
+
+# Similarity above which two questions are reported as near-duplicates
+DUPLICATE_THRESHOLD = 0.85
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or "
+    "that the this to what when where which why with you your".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def tokenize(text: str) -> list:
+    """Split text into lowercase word tokens, dropping stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def stem(token: str) -> str:
+    """Crude plural folding so "lists" matches "list"."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _features(text: str) -> list:
+    tokens = [stem(t) for t in tokenize(text)]
+    return tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]
+
+
+def vectorize(texts: Iterable[str], dim: int = VECTOR_DIM) -> np.ndarray:
+    """Embed texts as signed hashed n-gram counts, one row per text."""
+    rows, cols, signs = [], [], []
+    count = 0
+    for row, text in enumerate(texts):
+        count += 1
+        for feature in _features(text):
+            # crc32 is stable across processes, unlike hash()
+            h = zlib.crc32(feature.encode("utf-8"))
+            rows.append(row)
+            cols.append(h & (dim - 1))
+            signs.append(1.0 if h & 0x80000000 else -1.0)
+    vectors = np.zeros((count, dim), dtype=np.float32)
+    np.add.at(
+        vectors,
+        (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)),
+        np.asarray(signs, dtype=np.float32)
+    )
+    return vectors
+
+
+class SimilarityIndex:
+    """Hashed TF-IDF vectors of questions supporting batched cosine top-k queries.
+
+    Row i holds the raw hashed counts of question id i. Rows can be appended
+    incrementally with add(), after which IDF weights and row norms are
+    recomputed from the whole index; scoring applies them on the fly.
+    """
+
+    def __init__(self, dim: int = VECTOR_DIM, chunk_size: int = CHUNK_SIZE):
+        if dim & (dim - 1):
+            raise ValueError("dim must be a power of two")
+        self.dim = dim
+        self.chunk_size = chunk_size
+        self._matrix = np.empty((0, dim), dtype=np.float32)
+        self._size = 0
+        # Number of questions with a nonzero count in each bucket
+        self._df = np.zeros(dim, dtype=np.int64)
+        self._idf = np.ones(dim, dtype=np.float32)
+        # Norm of each row's IDF-weighted vector; 1 for empty rows
+        self._norms = np.empty(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The raw counts of every indexed question, one row per question id."""
+        return self._matrix[:self._size]
+
+    def add(self, texts: Iterable[str]) -> None:
+        """Append vectors for the next question ids, vectorizing in chunks."""
+        texts = iter(texts)
+        while True:
+            chunk = [text for _, text in zip(range(self.chunk_size), texts)]
+            if not chunk:
+                break
+            vectors = vectorize(chunk, self.dim)
+            end = self._size + len(vectors)
+            if end > len(self._matrix):
+                # Grow geometrically so incremental adds stay amortized O(1)
+                grown = np.empty((max(end, 2 * len(self._matrix)), self.dim), dtype=np.float32)
+                grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+            self._matrix[self._size:end] = vectors
+            self._df += np.count_nonzero(vectors, axis=0)
+            self._size = end
+        self._reweight()
+
+    def _reweight(self) -> None:
+        # Smoothed IDF, as in scikit-learn: rare buckets weigh more, none weigh zero
+        self._idf = (np.log((1 + self._size) / (1 + self._df)) + 1).astype(np.float32)
+        squared = self._idf * self._idf
+        matrix = self.matrix
+        norms = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), self.chunk_size):
+            block = matrix[start:start + self.chunk_size]
+            norms[start:start + len(block)] = np.sqrt((block * block) @ squared)
+        norms[norms == 0] = 1
+        self._norms = norms
+
+    def _query_weights(self, vectors: np.ndarray) -> np.ndarray:
+        # (q w) . (x w) / |q w| = (q w w / |q w|) . x, so rows need no reweighting per query
+        weighted = vectors * self._idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        np.divide(weighted, norms, out=weighted, where=norms > 0)
+        return weighted * self._idf
+
+    def top_k(self, queries: np.ndarray, k: int) -> tuple:
+        """Find the k most similar rows for each query vector of raw counts.
+
+        Returns (ids, scores) arrays of shape (len(queries), k), best first.
+        """
+        queries = self._query_weights(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        matrix = self.matrix
+        k = max(0, min(k, len(matrix)))
+        best_ids = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        if k == 0:
+            return best_ids, best_scores
+        # Few queries can score many rows per block within the same memory budget
+        block_size = max(self.chunk_size, MAX_SCORE_BLOCK // len(queries))
+        for start in range(0, len(matrix), block_size):
+            block = matrix[start:start + block_size]
+            block_scores = (queries @ block.T) / self._norms[start:start + len(block)]
+            scores = np.concatenate([best_scores, block_scores], axis=1)
+            block_ids = np.broadcast_to(
+                np.arange(start, start + len(block)), (len(queries), len(block))
+            )
+            ids = np.concatenate([best_ids, block_ids], axis=1)
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, keep, axis=1)
+                ids = np.take_along_axis(ids, keep, axis=1)
+            best_ids, best_scores = ids, scores
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return np.take_along_axis(best_ids, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def related(self, question_id: int, k: int = 5) -> list:
+        """Return up to k (question id, score) pairs most similar to a question."""
+        ids, scores = self.top_k(self.matrix[question_id], k + 1)
+        return [
+            (int(i), float(score))
+            for i, score in zip(ids[0], scores[0])
+            if i != question_id
+        ][:k]
+
+    def duplicates(
+        self,
+        threshold: float = DUPLICATE_THRESHOLD,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[tuple]:
+        """Yield (id_a, id_b, score) for every pair with id_a < id_b scoring at least threshold.
+
+        Pairs are found block by block, so memory use is bounded by
+        chunk_size squared rather than by the size of the bank.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        matrix = self.matrix
+        for row_start in range(0, len(matrix), chunk_size):
+            rows = self._query_weights(matrix[row_start:row_start + chunk_size])
+            for col_start in range(row_start, len(matrix), chunk_size):
+                cols = matrix[col_start:col_start + chunk_size]
+                scores = (rows @ cols.T) / self._norms[col_start:col_start + len(cols)]
+                hits = scores >= threshold
+                if col_start == row_start:
+                    # Only pairs above the diagonal within the same block
+                    hits &= np.triu(np.ones(hits.shape, dtype=bool), k=1)
+                a, b = np.nonzero(hits)
+                for i, j in zip(a.tolist(), b.tolist()):
+                    yield row_start + i, col_start + j, float(scores[i, j])
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Command-line entry point writing a near-duplicate report as JSON Lines."""
+    from backend import interview_engine
+
+    parser = argparse.ArgumentParser(description="Report near-duplicate questions in a question bank.")
+    parser.add_argument("--bank", default=interview_engine.QUESTION_BANK_PATH,
+                        help="JSON Lines file or directory (default: built-in questions)")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD,
+                        help="Cosine similarity in (0, 1] at or above which pairs are reported")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--output", help="Report file (default: stdout)")
+    args = parser.parse_args(argv)
+    if not 0 < args.threshold <= 1:
+        parser.error("--threshold must be in (0, 1]")
+
+    if args.bank:
+        bank = interview_engine.QuestionBank.from_jsonl(args.bank)
+    else:
+        bank = interview_engine.get_bank()
+    index = SimilarityIndex(chunk_size=args.chunk_size)
+    index.add(bank.text(i) for i in range(len(bank)))
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    pairs = 0
+    try:
+        for id_a, id_b, score in index.duplicates(args.threshold, args.chunk_size):
+            out.write(json.dumps({
+                "id_a": id_a,
+                "id_b": id_b,
+                "score": round(score, 4),
+                "question_a": bank.text(id_a),
+                "question_b": bank.text(id_b)
+            }) + "\n")
+            pairs += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Scanned {len(bank)} questions, found {pairs} near-duplicate pairs", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
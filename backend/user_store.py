@@ -0,0 +1,418 @@
+"""
+User storage backends.
+
+The in-memory store keeps users in a process-local dict and is meant for
+development. The SQLite store keeps users in a WAL-mode database file so that
+several uvicorn workers share the same accounts. Token revocations live in the
+store as well, so a logout on one worker is seen by every other worker.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+# Number of rows written per transaction by bulk_import
+BULK_IMPORT_BATCH_SIZE = 10000
+
+# Number of pooled connections per process for the SQLite store
+SQLITE_POOL_SIZE = 8
+
+
+class UserExistsError(Exception):
+    """Raised when a username or email is already registered."""
+
+    def __init__(self, field: str):
+        super().__init__(f"{field} already exists")
+        self.field = field
+
+
+class UserStore:
+    """Interface implemented by every user storage backend."""
+
+    def get(self, username: str) -> Optional[dict]:
+        """Return the user record for a username, or None."""
+        raise NotImplementedError
+
+    def email_exists(self, email: str) -> bool:
+        """Check whether an email is already registered."""
+        raise NotImplementedError
+
+    def add(self, username: str, email: str, hashed_password: str) -> None:
+        """Add a user, raising UserExistsError on a duplicate username or email."""
+        raise NotImplementedError
+
+    def delete(self, username: str) -> bool:
+        """Delete a user and report whether it existed."""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Return the number of stored users."""
+        raise NotImplementedError
+
+    def bulk_import(self, users: Iterable[dict], batch_size: int = BULK_IMPORT_BATCH_SIZE) -> int:
+        """Import user records, skipping duplicates, and return how many were added."""
+        added = 0
+        for user in users:
+            try:
+                self.add(user["username"], user["email"], user["hashed_password"])
+                added += 1
+            except UserExistsError:
+                continue
+        return added
+
+    def revoke_token(self, username: str, token_digest: bytes, expires_at: float) -> None:
+        """Reject one token until it expires, e.g. after logout."""
+        raise NotImplementedError
+
+    def revoke_user_tokens(self, username: str, revoked_at: float, expires_at: float) -> None:
+        """Reject every token issued to a user before revoked_at, until expires_at."""
+        raise NotImplementedError
+
+    def is_token_revoked(self, username: str, token_digest: bytes, issued_at: float) -> bool:
+        """Check a token against the revocations of it and of its user; issued_at is its iat."""
+        raise NotImplementedError
+
+    def revocations_since(self, last_id: int) -> tuple:
+        """Return (latest id, [(username, token_digest or None), ...]) for revocations after last_id."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+
+    # Async wrappers used by request handlers. Backends that block on I/O
+    # override these to run off the event loop.
+    async def aget(self, username: str) -> Optional[dict]:
+        return self.get(username)
+
+    async def aemail_exists(self, email: str) -> bool:
+        return self.email_exists(email)
+
+    async def aadd(self, username: str, email: str, hashed_password: str) -> None:
+        self.add(username, email, hashed_password)
+
+    async def adelete(self, username: str) -> bool:
+        return self.delete(username)
+
+    async def arevoke_token(self, username: str, token_digest: bytes, expires_at: float) -> None:
+        self.revoke_token(username, token_digest, expires_at)
+
+    async def arevoke_user_tokens(self, username: str, revoked_at: float, expires_at: float) -> None:
+        self.revoke_user_tokens(username, revoked_at, expires_at)
+
+    async def ais_token_revoked(self, username: str, token_digest: bytes, issued_at: float) -> bool:
+        return self.is_token_revoked(username, token_digest, issued_at)
+
+    async def arevocations_since(self, last_id: int) -> tuple:
+        return self.revocations_since(last_id)
+
+
+class InMemoryUserStore(UserStore):
+    """Process-local store backed by dicts keyed by username and email."""
+
+    def __init__(self):
+        self._users = {}
+        self._emails = {}
+        # id -> (username, token digest or None, revoked_at, expires_at)
+        self._revocations = OrderedDict()
+        self._revocation_id = 0
+        # token digest -> expires_at, and username -> (revoked_at, expires_at)
+        self._revoked_tokens = {}
+        self._revoked_users = {}
+        self._lock = threading.Lock()
+
+    def get(self, username: str) -> Optional[dict]:
+        return self._users.get(username)
+
+    def email_exists(self, email: str) -> bool:
+        return email in self._emails
+
+    def add(self, username: str, email: str, hashed_password: str) -> None:
+        with self._lock:
+            if username in self._users:
+                raise UserExistsError("Username")
+            if email in self._emails:
+                raise UserExistsError("Email")
+            self._users[username] = {
+                "username": username,
+                "email": email,
+                "hashed_password": hashed_password
+            }
+            self._emails[email] = username
+
+    def delete(self, username: str) -> bool:
+        with self._lock:
+            user = self._users.pop(username, None)
+            if user is None:
+                return False
+            self._emails.pop(user["email"], None)
+            return True
+
+    def count(self) -> int:
+        return len(self._users)
+
+    def _add_revocation(self, username: str, token_digest: Optional[bytes], revoked_at: float, expires_at: float) -> None:
+        with self._lock:
+            now = time.time()
+            for i, revocation in list(self._revocations.items()):
+                if revocation[3] <= now:
+                    del self._revocations[i]
+            for digest, exp in list(self._revoked_tokens.items()):
+                if exp <= now:
+                    del self._revoked_tokens[digest]
+            for name, (_, exp) in list(self._revoked_users.items()):
+                if exp <= now:
+                    del self._revoked_users[name]
+            self._revocation_id += 1
+            self._revocations[self._revocation_id] = (username, token_digest, revoked_at, expires_at)
+            if token_digest is not None:
+                self._revoked_tokens[token_digest] = expires_at
+            else:
+                self._revoked_users[username] = (revoked_at, expires_at)
+
+    def revoke_token(self, username: str, token_digest: bytes, expires_at: float) -> None:
+        self._add_revocation(username, token_digest, time.time(), expires_at)
+
+    def revoke_user_tokens(self, username: str, revoked_at: float, expires_at: float) -> None:
+        self._add_revocation(username, None, revoked_at, expires_at)
+
+    def is_token_revoked(self, username: str, token_digest: bytes, issued_at: float) -> bool:
+        if token_digest in self._revoked_tokens:
+            return True
+        revoked = self._revoked_users.get(username)
+        return revoked is not None and revoked[0] > issued_at
+
+    def revocations_since(self, last_id: int) -> tuple:
+        with self._lock:
+            revocations = [
+                (name, digest) for i, (name, digest, _, _) in self._revocations.items() if i > last_id
+            ]
+            return self._revocation_id, revocations
+
+
+class SQLiteUserStore(UserStore):
+    """SQLite store in WAL mode, shared by every worker process using the same file."""
+
+    def __init__(self, path: str, pool_size: int = SQLITE_POOL_SIZE):
+        self.path = path
+        self._pool = queue.LifoQueue(maxsize=max(1, pool_size))
+        for _ in range(max(1, pool_size)):
+            self._pool.put(None)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    hashed_password TEXT NOT NULL
+                );
+                CREATE UNIQUE INDEX IF NOT EXISTS users_username ON users (username);
+                CREATE UNIQUE INDEX IF NOT EXISTS users_email ON users (email);
+                CREATE TABLE IF NOT EXISTS revocations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT NOT NULL,
+                    token_digest BLOB,
+                    revoked_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS revocations_token ON revocations (token_digest);
+                CREATE INDEX IF NOT EXISTS revocations_username ON revocations (username, revoked_at);
+                CREATE INDEX IF NOT EXISTS revocations_expires ON revocations (expires_at);
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection from the pool, opening it on first use."""
+        conn = self._pool.get()
+        try:
+            if conn is None:
+                conn = self._connect()
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def get(self, username: str) -> Optional[dict]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT username, email, hashed_password FROM users WHERE username = ?",
+                (username,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def email_exists(self, email: str) -> bool:
+        with self._connection() as conn:
+            row = conn.execute("SELECT 1 FROM users WHERE email = ?", (email,)).fetchone()
+        return row is not None
+
+    def add(self, username: str, email: str, hashed_password: str) -> None:
+        with self._connection() as conn:
+            try:
+                conn.execute(
+                    "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)",
+                    (username, email, hashed_password)
+                )
+            except sqlite3.IntegrityError as exc:
+                field = "Email" if "users.email" in str(exc) else "Username"
+                raise UserExistsError(field) from exc
+
+    def delete(self, username: str) -> bool:
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM users WHERE username = ?", (username,))
+        return cursor.rowcount > 0
+
+    def count(self) -> int:
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def bulk_import(self, users: Iterable[dict], batch_size: int = BULK_IMPORT_BATCH_SIZE) -> int:
+        added = 0
+        rows = ((u["username"], u["email"], u["hashed_password"]) for u in users)
+        with self._connection() as conn:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                before = conn.total_changes
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO users (username, email, hashed_password) "
+                        "VALUES (?, ?, ?)",
+                        batch
+                    )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                added += conn.total_changes - before
+        return added
+
+    def _add_revocation(self, username: str, token_digest: Optional[bytes], revoked_at: float, expires_at: float) -> None:
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM revocations WHERE expires_at <= ?", (time.time(),))
+                conn.execute(
+                    "INSERT INTO revocations (username, token_digest, revoked_at, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (username, token_digest, revoked_at, expires_at)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def revoke_token(self, username: str, token_digest: bytes, expires_at: float) -> None:
+        self._add_revocation(username, token_digest, time.time(), expires_at)
+
+    def revoke_user_tokens(self, username: str, revoked_at: float, expires_at: float) -> None:
+        self._add_revocation(username, None, revoked_at, expires_at)
+
+    def is_token_revoked(self, username: str, token_digest: bytes, issued_at: float) -> bool:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM revocations WHERE token_digest = ? "
+                "UNION ALL SELECT 1 FROM revocations "
+                "WHERE username = ? AND token_digest IS NULL AND revoked_at > ? LIMIT 1",
+                (token_digest, username, issued_at)
+            ).fetchone()
+        return row is not None
+
+    def revocations_since(self, last_id: int) -> tuple:
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT id, username, token_digest FROM revocations WHERE id > ? ORDER BY id",
+                (last_id,)
+            ).fetchall()
+        if not rows:
+            return last_id, []
+        return rows[-1]["id"], [(row["username"], row["token_digest"]) for row in rows]
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            if conn is not None:
+                conn.close()
+
+    async def aget(self, username: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.get, username)
+
+    async def aemail_exists(self, email: str) -> bool:
+        return await asyncio.to_thread(self.email_exists, email)
+
+    async def aadd(self, username: str, email: str, hashed_password: str) -> None:
+        await asyncio.to_thread(self.add, username, email, hashed_password)
+
+    async def adelete(self, username: str) -> bool:
+        return await asyncio.to_thread(self.delete, username)
+
+    async def arevoke_token(self, username: str, token_digest: bytes, expires_at: float) -> None:
+        await asyncio.to_thread(self.revoke_token, username, token_digest, expires_at)
+
+    async def arevoke_user_tokens(self, username: str, revoked_at: float, expires_at: float) -> None:
+        await asyncio.to_thread(self.revoke_user_tokens, username, revoked_at, expires_at)
+
+    async def ais_token_revoked(self, username: str, token_digest: bytes, issued_at: float) -> bool:
+        return await asyncio.to_thread(self.is_token_revoked, username, token_digest, issued_at)
+
+    async def arevocations_since(self, last_id: int) -> tuple:
+        return await asyncio.to_thread(self.revocations_since, last_id)
+
+
+def create_user_store(path: Optional[str] = None) -> UserStore:
+    """Create the SQLite store when a database path is given, else the in-memory store."""
+    if path:
+        return SQLiteUserStore(path)
+    return InMemoryUserStore()
+
+
+def iter_user_dump(path: str) -> Iterator[dict]:
+    """Stream user records from a JSON Lines dump."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Command-line entry point for bulk-importing a user dump."""
+    parser = argparse.ArgumentParser(description="Import users into the SQLite user store.")
+    parser.add_argument("dump", help="JSON Lines file with username, email and hashed_password")
+    parser.add_argument("--db", default=os.getenv("USER_DB_PATH"), required=not os.getenv("USER_DB_PATH"))
+    parser.add_argument("--batch-size", type=int, default=BULK_IMPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    store = SQLiteUserStore(args.db)
+    try:
+        added = store.bulk_import(iter_user_dump(args.dump), batch_size=args.batch_size)
+        print(f"Imported {added} users ({store.count()} total)")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,490 @@
+"""
+Benchmark and load-test suite for the API hot paths.
+
+By default the app is driven in-process through httpx's ASGI transport, which
+measures the application without network noise. With --uvicorn a real uvicorn
+server is started on a local port, and with --url an already running server is
+targeted instead.
+
+    python -m benchmarks.bench_api run --output results.json
+    python -m benchmarks.bench_api run --scenario questions --uvicorn
+    python -m benchmarks.bench_api compare baseline.json results.json
+
+Each scenario runs --repeat times and reports the median throughput and
+p50/p95/p99 latency, plus each metric's per-run values and spread. compare
+exits with status 1 when a metric moved the wrong way by more than the
+threshold and either the baseline's spread or the gap between the two reports'
+run ranges, when a scenario's error rate went up, or when a scenario is
+missing from either report.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+import httpx
+
+# Cheap hashes keep signup/login scenarios about the app rather than bcrypt cost
+DEFAULT_BCRYPT_ROUNDS = "4"
+
+# Every benchmark request comes from one address, so auth rate limits are off unless set
+DEFAULT_RATE_LIMIT_ENABLED = "0"
+
+# Smallest fractional change that counts as a regression in compare mode
+DEFAULT_THRESHOLD = 0.10
+
+# Runs per scenario; the report holds the median of each metric
+DEFAULT_REPEAT = 3
+
+SUMMARY_METRICS = ("throughput_rps", "mean_ms", "p50_ms", "p95_ms", "p99_ms")
+
+# (metric, higher is better) pairs checked by compare
+COMPARED_METRICS = (("throughput_rps", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False))
+
+SCENARIOS = ("auth_storm", "me_topics", "questions", "mixed")
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+async def collect(
+    operation: Callable[[int], Awaitable[httpx.Response]],
+    requests: int,
+    concurrency: int
+) -> tuple:
+    """Run `requests` calls of an operation with `concurrency` workers.
+
+    Returns (latencies, status counts, wall-clock duration).
+    """
+    latencies = []
+    statuses = {}
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                status = str((await operation(index)).status_code)
+            except httpx.HTTPError:
+                status = "error"
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+def summarize(name: str, latencies: list, statuses: dict, duration: float, concurrency: int) -> dict:
+    """Summarize collected latencies into throughput and percentile figures."""
+    latencies = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "status_counts": statuses,
+        "duration_s": round(duration, 4),
+        "throughput_rps": round(len(latencies) / duration, 2) if duration else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3)
+    }
+
+
+async def drive(
+    name: str,
+    operation: Callable[[int], Awaitable[httpx.Response]],
+    requests: int,
+    concurrency: int
+) -> dict:
+    """Run an operation under load and summarize it."""
+    return summarize(name, *await collect(operation, requests, concurrency), concurrency)
+
+
+async def create_users(client: httpx.AsyncClient, prefix: str, count: int, concurrency: int) -> list:
+    """Sign up and log in `count` users, returning their auth headers."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create(i: int) -> dict:
+        username = f"{prefix}{i}"
+        async with semaphore:
+            await client.post("/signup", json={
+                "username": username, "email": f"{username}@bench.local", "password": "bench-password"
+            })
+            response = await client.post("/login", json={"username": username, "password": "bench-password"})
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return await asyncio.gather(*(create(i) for i in range(count)))
+
+
+async def scenario_auth_storm(client, args, rng) -> dict:
+    """A burst of signups for fresh users, then a burst of logins as those users."""
+    prefix = f"storm{rng.randrange(10**9)}_"
+    users = max(1, args.requests // 2)
+
+    async def signup(i: int):
+        username = f"{prefix}{i}"
+        return await client.post("/signup", json={
+            "username": username, "email": f"{username}@bench.local", "password": "bench-password"
+        })
+
+    async def login(i: int):
+        return await client.post("/login", json={"username": f"{prefix}{i}", "password": "bench-password"})
+
+    signup_latencies, signup_statuses, signup_duration = await collect(signup, users, args.concurrency)
+    login_latencies, login_statuses, login_duration = await collect(login, users, args.concurrency)
+    statuses = dict(signup_statuses)
+    for status, count in login_statuses.items():
+        statuses[status] = statuses.get(status, 0) + count
+    return summarize(
+        "auth_storm", signup_latencies + login_latencies, statuses,
+        signup_duration + login_duration, args.concurrency
+    )
+
+
+async def scenario_me_topics(client, args, rng) -> dict:
+    """Authenticated polling of /me and /topics with a pool of tokens."""
+    headers = await create_users(client, f"poll{rng.randrange(10**9)}_", args.users, args.concurrency)
+
+    async def operation(i: int):
+        path = "/me" if i % 2 == 0 else "/topics"
+        return await client.get(path, headers=headers[i % len(headers)])
+
+    return await drive("me_topics", operation, args.requests, args.concurrency)
+
+
+async def scenario_questions(client, args, rng) -> dict:
+    """/questions over several counts, with and without a sampling seed."""
+    headers = await create_users(client, f"questions{rng.randrange(10**9)}_", args.users, args.concurrency)
+    topics = (await client.get("/topics", headers=headers[0])).json()["topics"]
+    counts = (1, 5, 20, 50)
+
+    async def operation(i: int):
+        params = {"topic": topics[i % len(topics)], "count": counts[i % len(counts)]}
+        if i % 3 == 0:
+            params["seed"] = i
+        return await client.get("/questions", params=params, headers=headers[i % len(headers)])
+
+    return await drive("questions", operation, args.requests, args.concurrency)
+
+
+async def scenario_mixed(client, args, rng) -> dict:
+    """Realistic blend of browsing, interview sessions and occasional logins."""
+    prefix = f"mixed{rng.randrange(10**9)}_"
+    headers = await create_users(client, prefix, args.users, args.concurrency)
+    topics = (await client.get("/topics", headers=headers[0])).json()["topics"]
+    # Decide the whole request mix up front so runs are reproducible
+    plan = rng.choices(
+        ("topics", "questions", "me", "session", "login"),
+        weights=(30, 30, 20, 15, 5),
+        k=args.requests
+    )
+
+    async def operation(i: int):
+        user = i % len(headers)
+        kind = plan[i]
+        if kind == "topics":
+            return await client.get("/topics", headers=headers[user])
+        if kind == "questions":
+            params = {"topic": topics[i % len(topics)], "count": 5}
+            return await client.get("/questions", params=params, headers=headers[user])
+        if kind == "me":
+            return await client.get("/me", headers=headers[user])
+        if kind == "session":
+            response = await client.post(
+                "/sessions", json={"topic": topics[i % len(topics)], "count": 3, "seed": i},
+                headers=headers[user]
+            )
+            if response.status_code != 200:
+                return response
+            session_id = response.json()["session_id"]
+            await client.get(f"/sessions/{session_id}/next", headers=headers[user])
+            return await client.post(
+                f"/sessions/{session_id}/answers", json={"answer": "benchmark answer"},
+                headers=headers[user]
+            )
+        return await client.post("/login", json={"username": f"{prefix}{user}", "password": "bench-password"})
+
+    return await drive("mixed", operation, args.requests, args.concurrency)
+
+
+SCENARIO_FUNCTIONS = {
+    "auth_storm": scenario_auth_storm,
+    "me_topics": scenario_me_topics,
+    "questions": scenario_questions,
+    "mixed": scenario_mixed
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(port: int, env: dict) -> subprocess.Popen:
+    """Start uvicorn serving the app and wait until it answers."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        env=env
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 30 seconds")
+
+
+def aggregate(runs: list) -> dict:
+    """Combine repeated runs of a scenario into median metrics, per-run values and spread.
+
+    A metric's spread is its range across runs relative to its median.
+    """
+    result = {
+        "scenario": runs[0]["scenario"],
+        "repeat": len(runs),
+        "requests": sum(run["requests"] for run in runs),
+        "concurrency": runs[0]["concurrency"],
+        "errors": sum(run["errors"] for run in runs),
+        "status_counts": {},
+        "duration_s": round(sum(run["duration_s"] for run in runs), 4)
+    }
+    for run in runs:
+        for status, count in run["status_counts"].items():
+            result["status_counts"][status] = result["status_counts"].get(status, 0) + count
+    spread, samples = {}, {}
+    for metric in SUMMARY_METRICS:
+        values = [run[metric] for run in runs]
+        median = statistics.median(values)
+        result[metric] = round(median, 3)
+        samples[metric] = [round(value, 3) for value in values]
+        spread[metric] = round((max(values) - min(values)) / median, 4) if median else 0.0
+    result["spread"] = spread
+    result["runs"] = samples
+    return result
+
+
+async def run_scenarios(client: httpx.AsyncClient, args) -> dict:
+    results = {}
+    for name in args.scenario:
+        # A fresh seed per scenario keeps each one reproducible on its own
+        rng = random.Random(f"{args.seed}:{name}")
+        if args.warmup:
+            warmup_args = argparse.Namespace(**{**vars(args), "requests": args.warmup})
+            await SCENARIO_FUNCTIONS[name](client, warmup_args, rng)
+        runs = [await SCENARIO_FUNCTIONS[name](client, args, rng) for _ in range(max(1, args.repeat))]
+        result = aggregate(runs)
+        results[name] = result
+        print(
+            f"{name:<12} {result['throughput_rps']:>10.1f} req/s  "
+            f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+            f"p99 {result['p99_ms']:>8.2f} ms  errors {result['errors']}  "
+            f"(median of {result['repeat']}, throughput spread {result['spread']['throughput_rps']:.1%})",
+            file=sys.stderr
+        )
+    return results
+
+
+async def run_in_process(args) -> dict:
+    os.environ.setdefault("BCRYPT_ROUNDS", args.bcrypt_rounds)
+    os.environ.setdefault("RATE_LIMIT_ENABLED", DEFAULT_RATE_LIMIT_ENABLED)
+    from backend.main import app
+
+    # The ASGI transport does not send lifespan events, so run startup/shutdown here
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await run_scenarios(client, args)
+    finally:
+        await app.router.shutdown()
+
+
+async def run_against(url: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        return await run_scenarios(client, args)
+
+
+def command_run(args) -> int:
+    process = None
+    if args.uvicorn:
+        env = {
+            **os.environ,
+            "BCRYPT_ROUNDS": os.environ.get("BCRYPT_ROUNDS", args.bcrypt_rounds),
+            "RATE_LIMIT_ENABLED": os.environ.get("RATE_LIMIT_ENABLED", DEFAULT_RATE_LIMIT_ENABLED)
+        }
+        port = free_port()
+        process = start_uvicorn(port, env)
+        args.url = f"http://127.0.0.1:{port}"
+    try:
+        if args.url:
+            mode = "uvicorn" if process else "remote"
+            results = asyncio.run(run_against(args.url, args))
+        else:
+            mode = "in-process"
+            results = asyncio.run(run_in_process(args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "mode": mode,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests": args.requests,
+            "repeat": args.repeat,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "seed": args.seed,
+            "bcrypt_rounds": os.environ.get("BCRYPT_ROUNDS", args.bcrypt_rounds),
+            "rate_limit_enabled": os.environ.get("RATE_LIMIT_ENABLED", DEFAULT_RATE_LIMIT_ENABLED)
+        },
+        "scenarios": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+def runs_separated(before: dict, after: dict, metric: str, higher_is_better: bool) -> bool:
+    """Check whether every current run of a metric is worse than every baseline run."""
+    old_runs = before.get("runs", {}).get(metric)
+    new_runs = after.get("runs", {}).get(metric)
+    if not old_runs or not new_runs:
+        return False
+    if higher_is_better:
+        return max(new_runs) < min(old_runs)
+    return min(new_runs) > max(old_runs)
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float) -> list:
+    """Compare two reports and return (scenario, metric, before, after, change, limit, regressed) rows.
+
+    A metric regresses when it moves the wrong way by more than the larger of
+    the threshold and its spread in the baseline. A change past the threshold
+    but within that spread still regresses when every current run is worse
+    than every baseline run. The current report's spread never widens the
+    limit, so a noisy regression cannot hide behind its own noise. Error rows
+    compare error rates, and scenario rows flag a scenario missing from either
+    report; both have no change or limit.
+    """
+    rows = []
+    names = list(baseline["scenarios"]) + [n for n in current["scenarios"] if n not in baseline["scenarios"]]
+    for name in names:
+        before = baseline["scenarios"].get(name)
+        after = current["scenarios"].get(name)
+        if before is None or after is None:
+            rows.append((name, "scenario", before is not None, after is not None, None, None, True))
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, new = before[metric], after[metric]
+            change = (new - old) / old if old else 0.0
+            # Reports without repeats have no spread and fall back to the threshold
+            limit = max(threshold, before.get("spread", {}).get(metric, 0.0))
+            worse = -change if higher_is_better else change
+            regressed = worse > limit or (worse > threshold and runs_separated(before, after, metric, higher_is_better))
+            rows.append((name, metric, old, new, change, limit, regressed))
+        old_rate = before["errors"] / before["requests"] if before["requests"] else 0.0
+        new_rate = after["errors"] / after["requests"] if after["requests"] else 0.0
+        rows.append((name, "errors", before["errors"], after["errors"], None, None, new_rate > old_rate))
+    return rows
+
+
+def command_compare(args) -> int:
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    rows = compare_reports(baseline, current, args.threshold)
+    for name, metric, old, new, change, limit, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        if metric == "scenario":
+            old, new = ("present" if old else "missing"), ("present" if new else "missing")
+            print(f"{name:<12} {metric:<15} {old:>12} -> {new:>12}  {flag}")
+        elif change is None:
+            print(f"{name:<12} {metric:<15} {old:>12} -> {new:>12}  {flag}")
+        else:
+            print(
+                f"{name:<12} {metric:<15} {old:>12.2f} -> {new:>12.2f}  {change:>+8.1%}  "
+                f"(limit {limit:.1%})  {flag}"
+            )
+    regressions = sum(1 for row in rows if row[6])
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%} and the baseline's spread or run range")
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the AI Interview Platform API.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Run benchmark scenarios")
+    run.add_argument("--scenario", action="append", choices=SCENARIOS,
+                     help="Scenario to run; repeatable (default: all)")
+    run.add_argument("--requests", type=int, default=2000, help="Requests per scenario")
+    run.add_argument("--concurrency", type=int, default=32)
+    run.add_argument("--users", type=int, default=20, help="Users created for authenticated scenarios")
+    run.add_argument("--warmup", type=int, default=200, help="Warm-up requests per scenario (0 disables)")
+    run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                     help="Runs per scenario; metrics are the median across runs (default: 3)")
+    run.add_argument("--seed", type=int, default=1234)
+    run.add_argument("--bcrypt-rounds", default=DEFAULT_BCRYPT_ROUNDS,
+                     help="bcrypt rounds unless BCRYPT_ROUNDS is already set")
+    target = run.add_mutually_exclusive_group()
+    target.add_argument("--uvicorn", action="store_true", help="Start a local uvicorn server and benchmark it")
+    target.add_argument("--url", help="Benchmark an already running server")
+    run.add_argument("--output", help="Write JSON results here (default: stdout)")
+    run.set_defaults(func=command_run)
+
+    compare = subparsers.add_parser("compare", help="Compare results against a baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                         help="Smallest fractional change counted as a regression; widened to "
+                              "the baseline's spread unless the run ranges do not overlap (default: 0.10)")
+    compare.set_defaults(func=command_compare)
+
+    args = parser.parse_args(argv)
+    if args.command == "run" and not args.scenario:
+        args.scenario = list(SCENARIOS)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -105,7 +105,18 @@ async function login(username, password) {
 }
 
 // Logout function
-function logout() {
+async function logout() {
+    if (getToken()) {
+        try {
+            // Revoke the token on the server so it stops working immediately
+            await fetch(`${API_BASE_URL}/logout`, {
+                method: 'POST',
+                headers: getAuthHeaders()
+            });
+        } catch (error) {
+            console.error('Logout request failed:', error);
+        }
+    }
     clearToken();
     window.location.href = 'login.html';
 }
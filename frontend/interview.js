@@ -1,5 +1,12 @@
 // API configuration - easy to change for different environments
 const API_BASE_URL = 'http://localhost:8000';
+const WS_BASE_URL = API_BASE_URL.replace(/^http/, 'ws');
+
+// Number of questions per interview
+const QUESTIONS_PER_INTERVIEW = 5;
+
+// Live interview connection, if any
+let interviewSocket = null;
 
 // Get auth headers with token
 function getAuthHeaders() {
@@ -34,30 +41,6 @@ async function loadTopics() {
     }
 }
 
-// Generate questions for a topic
-async function generateQuestions(topic, count = 5) {
-    try {
-        const response = await fetch(`${API_BASE_URL}/questions?topic=${encodeURIComponent(topic)}&count=${count}`, {
-            headers: getAuthHeaders()
-        });
-
-        if (!response.ok) {
-            if (response.status === 401) {
-                window.location.href = 'login.html';
-                return;
-            }
-            throw new Error('Failed to generate questions');
-        }
-
-        const data = await response.json();
-        return data.questions;
-    } catch (error) {
-        console.error('Error generating questions:', error);
-        showError('Failed to generate questions. Please try again.');
-        return [];
-    }
-}
-
 // Display topics in the UI
 function displayTopics(topics) {
     const topicsContainer = document.getElementById('topics-container');
@@ -81,8 +64,8 @@ function displayTopics(topics) {
     });
 }
 
-// Start interview for selected topic
-async function startInterview(topic) {
+// Start interview for selected topic over a single WebSocket connection
+function startInterview(topic) {
     const loadingIndicator = document.getElementById('loading');
     const questionsContainer = document.getElementById('questions-container');
     const topicsSection = document.getElementById('topics-section');
@@ -92,24 +75,61 @@ async function startInterview(topic) {
     if (questionsContainer) questionsContainer.innerHTML = '';
     if (topicsSection) topicsSection.style.display = 'none';
 
-    // Generate questions
-    const questions = await generateQuestions(topic);
+    closeInterviewSocket();
+    const socket = new WebSocket(`${WS_BASE_URL}/ws/interview`);
+    interviewSocket = socket;
 
-    // Hide loading
-    if (loadingIndicator) loadingIndicator.style.display = 'none';
+    // Authenticate once; every later message rides on this connection
+    socket.onopen = () => {
+        socket.send(JSON.stringify({ type: 'auth', token: localStorage.getItem('token') }));
+    };
+    socket.onmessage = (event) => handleInterviewMessage(socket, topic, JSON.parse(event.data));
+    socket.onclose = (event) => {
+        if (event.code === 1008) {
+            localStorage.removeItem('token');
+            window.location.href = 'login.html';
+        }
+    };
+    socket.onerror = () => {
+        if (loadingIndicator) loadingIndicator.style.display = 'none';
+        showError('Connection to the interview server failed. Please try again.');
+        goBackToTopics();
+    };
+}
 
-    if (questions.length === 0) {
-        showError('No questions available for this topic.');
-        if (topicsSection) topicsSection.style.display = 'block';
-        return;
-    }
+// Handle a message pushed by the interview server
+function handleInterviewMessage(socket, topic, message) {
+    const loadingIndicator = document.getElementById('loading');
 
-    // Display questions
-    displayQuestions(topic, questions);
+    switch (message.type) {
+        case 'ready':
+            socket.send(JSON.stringify({ type: 'start', topic, count: QUESTIONS_PER_INTERVIEW }));
+            break;
+        case 'session':
+            if (loadingIndicator) loadingIndicator.style.display = 'none';
+            displayInterview(topic);
+            break;
+        case 'question':
+            displayQuestion(socket, message);
+            break;
+        case 'score':
+            displayScore(message);
+            break;
+        case 'complete':
+            displayComplete(message);
+            break;
+        case 'error':
+            if (loadingIndicator) loadingIndicator.style.display = 'none';
+            showError(message.detail || 'Something went wrong.');
+            if (!document.getElementById('current-question')) {
+                goBackToTopics();
+            }
+            break;
+    }
 }
 
-// Display questions
-function displayQuestions(topic, questions) {
+// Set up the interview view for a topic
+function displayInterview(topic) {
     const questionsContainer = document.getElementById('questions-container');
     const questionsSection = document.getElementById('questions-section');
     const topicsSection = document.getElementById('topics-section');
@@ -119,24 +139,143 @@ function displayQuestions(topic, questions) {
     if (topicsSection) topicsSection.style.display = 'none';
     if (questionsSection) questionsSection.style.display = 'block';
 
-    questionsContainer.innerHTML = `
-        <div class="questions-header">
-            <h2>Interview Questions: ${topic}</h2>
-            <button class="btn btn-secondary" onclick="goBackToTopics()">Back to Topics</button>
-        </div>
-        <div class="questions-list">
-            ${questions.map((q, index) => `
-                <div class="question-card">
-                    <div class="question-number">Question ${index + 1}</div>
-                    <div class="question-text">${q}</div>
-                </div>
-            `).join('')}
-        </div>
-    `;
+    questionsContainer.innerHTML = '';
+
+    const header = document.createElement('div');
+    header.className = 'questions-header';
+    const title = document.createElement('h2');
+    title.textContent = `Interview Questions: ${topic}`;
+    const backButton = document.createElement('button');
+    backButton.className = 'btn btn-secondary';
+    backButton.textContent = 'Back to Topics';
+    backButton.addEventListener('click', goBackToTopics);
+    header.append(title, backButton);
+
+    const answeredList = document.createElement('div');
+    answeredList.className = 'questions-list';
+    answeredList.id = 'answered-questions';
+
+    const current = document.createElement('div');
+    current.id = 'current-question';
+
+    questionsContainer.append(header, answeredList, current);
+}
+
+// Show the current question with an answer box
+function displayQuestion(socket, message) {
+    const current = document.getElementById('current-question');
+    if (!current) return;
+
+    const card = document.createElement('div');
+    card.className = 'question-card';
+
+    const number = document.createElement('div');
+    number.className = 'question-number';
+    number.textContent = `Question ${message.index + 1} of ${message.total}`;
+
+    const text = document.createElement('div');
+    text.className = 'question-text';
+    text.textContent = message.question;
+
+    const answer = document.createElement('textarea');
+    answer.className = 'answer-input';
+    answer.rows = 6;
+    answer.placeholder = 'Type your answer...';
+
+    const submit = document.createElement('button');
+    submit.className = 'btn btn-primary';
+    submit.textContent = 'Submit Answer';
+    submit.addEventListener('click', () => {
+        submit.disabled = true;
+        socket.send(JSON.stringify({
+            type: 'answer',
+            question_id: message.question_id,
+            answer: answer.value
+        }));
+        recordAnsweredQuestion(message, answer.value);
+    });
+
+    card.append(number, text, answer, submit);
+    current.replaceChildren(card);
+    answer.focus();
+}
+
+// Move an answered question into the answered list
+function recordAnsweredQuestion(message, answerText) {
+    const answeredList = document.getElementById('answered-questions');
+    if (!answeredList) return;
+
+    const card = document.createElement('div');
+    card.className = 'question-card';
+    card.id = `answered-${message.index}`;
+    card.dataset.sessionId = message.session_id;
+
+    const number = document.createElement('div');
+    number.className = 'question-number';
+    number.textContent = `Question ${message.index + 1}`;
+
+    const text = document.createElement('div');
+    text.className = 'question-text';
+    text.textContent = message.question;
+
+    const answer = document.createElement('div');
+    answer.className = 'answer-text';
+    answer.textContent = answerText;
+
+    const score = document.createElement('div');
+    score.className = 'answer-score';
+    score.textContent = 'Scoring...';
+
+    card.append(number, text, answer, score);
+    answeredList.appendChild(card);
+}
+
+// Show the score of an answered question
+function displayScore(message) {
+    const card = document.getElementById(`answered-${message.index}`);
+    // Scores from an earlier session on this connection can arrive late
+    if (!card || card.dataset.sessionId !== message.session_id) return;
+    const score = card.querySelector('.answer-score');
+    if (!score) return;
+
+    if (message.status !== 'done' || !message.result) {
+        score.textContent = 'Score unavailable';
+        return;
+    }
+    const percent = Math.round(message.result.score * 100);
+    const missing = message.result.missing.length
+        ? ` · Missing: ${message.result.missing.join(', ')}`
+        : '';
+    score.textContent = `Score: ${percent}%${missing}`;
+}
+
+// Show the end of the interview
+function displayComplete(message) {
+    const current = document.getElementById('current-question');
+    if (!current) return;
+
+    const card = document.createElement('div');
+    card.className = 'question-card';
+    const text = document.createElement('div');
+    text.className = 'question-text';
+    text.textContent = `Interview complete! You answered ${message.answered} of ${message.total} questions.`;
+    card.appendChild(text);
+    current.replaceChildren(card);
+}
+
+// Close the live interview connection
+function closeInterviewSocket() {
+    if (interviewSocket) {
+        interviewSocket.onclose = null;
+        interviewSocket.close();
+        interviewSocket = null;
+    }
 }
 
 // Go back to topics
 function goBackToTopics() {
+    closeInterviewSocket();
+
     const topicsSection = document.getElementById('topics-section');
     const questionsSection = document.getElementById('questions-section');
 